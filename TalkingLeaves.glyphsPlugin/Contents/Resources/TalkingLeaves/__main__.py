@@ -0,0 +1,417 @@
+'''
+Headless TalkingLeaves, for checking fonts outside of Glyphs (e.g. in CI).
+Run it from the plugin's Resources folder, or add that folder to PYTHONPATH:
+
+  python3 -m TalkingLeaves coverage Fonts/*.ttf
+  python3 -m TalkingLeaves coverage --script Latn --output report.tsv Fonts/
+  python3 -m TalkingLeaves shape --output shaping.tsv Fonts/
+  python3 -m TalkingLeaves watch Sources/MyFont.glyphs
+  python3 -m TalkingLeaves history --output history.csv Sources/MyFont.glyphs
+  python3 -m TalkingLeaves db update Fonts/
+  python3 -m TalkingLeaves db missing U+01DD --lang-status living --ortho-status primary
+  python3 -m TalkingLeaves serve --port 8766
+
+Requires hyperglot and pandas, but not AppKit or Glyphs.
+'''
+
+import argparse, json, pathlib, sys, time
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(prog='python3 -m TalkingLeaves', description=__doc__.strip().splitlines()[0])
+  commands = parser.add_subparsers(dest='command', required=True)
+
+  coverage = commands.add_parser(
+    'coverage',
+    help='check language coverage of compiled fonts (TTF, OTF, TTC, WOFF, WOFF2)',
+  )
+  coverage.add_argument('fonts', nargs='+', type=pathlib.Path, help='font files, or folders to search for fonts')
+  coverage.add_argument('--script', action='append', dest='scripts', metavar='ISO', help='only check this script (ISO 15924 code, can be repeated)')
+  coverage.add_argument('--output', '-o', type=pathlib.Path, help='write full coverage of every font to a .tsv, .csv, .json or .parquet file')
+  coverage.set_defaults(func=cmdCoverage)
+
+  shape = commands.add_parser(
+    'shape',
+    help='check that compiled fonts shape the languages they cover with HarfBuzz: no .notdef, marks attach, joining forms (needs uharfbuzz)',
+  )
+  shape.add_argument('fonts', nargs='+', type=pathlib.Path, help='font files, or folders to search for fonts')
+  shape.add_argument('--script', action='append', dest='scripts', metavar='ISO', help='only check this script (ISO 15924 code, can be repeated)')
+  shape.add_argument('--all', action='store_true', help='also check languages whose chars are not all in the font')
+  shape.add_argument('--output', '-o', type=pathlib.Path, help='write the problems of every language to a .tsv, .csv, .json or .parquet file')
+  shape.add_argument('--jobs', '-j', type=int, metavar='N', help='number of processes for shaping (default: number of CPUs)')
+  shape.set_defaults(func=cmdShape)
+
+  watch = commands.add_parser(
+    'watch',
+    help='report coverage of font sources (.glyphs, .glyphspackage, .ufo) as JSON lines, every time they are saved',
+  )
+  watch.add_argument('sources', nargs='+', type=pathlib.Path, help='font sources to watch')
+  watch.add_argument('--script', action='append', dest='scripts', metavar='ISO', help='only check this script (ISO 15924 code, can be repeated)')
+  watch.add_argument('--interval', type=float, default=0.25, metavar='SECONDS', help='how often to check the sources for changes (default: %(default)s)')
+  watch.set_defaults(func=cmdWatch)
+
+  history = commands.add_parser(
+    'history',
+    help='report coverage of a font source (.glyphs, .glyphspackage, .ufo) at every commit in its git history',
+  )
+  history.add_argument('source', type=pathlib.Path, help='font source in a git repository')
+  history.add_argument('--script', action='append', dest='scripts', metavar='ISO', help='only check this script (ISO 15924 code, can be repeated)')
+  history.add_argument('--output', '-o', type=pathlib.Path, help='write complete/total languages of each script at each commit to a .tsv, .csv, .json or .parquet file')
+  history.add_argument('--jobs', '-j', type=int, metavar='N', help='number of processes for reading revisions (default: number of CPUs)')
+  history.set_defaults(func=cmdHistory)
+
+  db = commands.add_parser(
+    'db',
+    help='store languages and font coverage in an SQLite database, and query it',
+  )
+  db.add_argument('--db', type=pathlib.Path, metavar='PATH', help='database file (default: coverage.sqlite in the TalkingLeaves cache folder)')
+  dbCommands = db.add_subparsers(dest='dbCommand', required=True)
+  dbUpdate = dbCommands.add_parser('update', help='add or update the coverage of fonts (TTF, OTF, TTC, WOFF, WOFF2)')
+  dbUpdate.add_argument('fonts', nargs='*', type=pathlib.Path, help='font files, or folders to search for fonts')
+  dbUpdate.set_defaults(func=cmdDbUpdate)
+  dbMissing = dbCommands.add_parser('missing', help='list the fonts and languages missing a char')
+  dbMissing.add_argument('char', type=parseCodepoint, help='a char, or its codepoint as U+01DD or 0x1DD')
+  dbMissing.add_argument('--lang-status', help='e.g. living, historical, constructed')
+  dbMissing.add_argument('--ortho-status', help='e.g. primary, secondary, historical, transliteration')
+  dbMissing.set_defaults(func=cmdDbMissing)
+  dbQuery = dbCommands.add_parser('query', help='run an SQL query')
+  dbQuery.add_argument('sql')
+  dbQuery.set_defaults(func=cmdDbQuery)
+
+  serve = commands.add_parser(
+    'serve',
+    help='keep the language data loaded and answer coverage queries over HTTP (see service.py)',
+  )
+  serve.add_argument('--host', default='127.0.0.1', help='address to listen on (default: %(default)s)')
+  serve.add_argument('--port', type=int, default=8766, help='port to listen on (default: %(default)s)')
+  serve.add_argument('--socket', type=pathlib.Path, metavar='PATH', help='listen on a Unix socket instead of a port')
+  serve.add_argument('--workers', type=int, default=8, metavar='N', help='requests handled at the same time (default: %(default)s)')
+  serve.add_argument('--verbose', '-v', action='store_true', help='log every request')
+  serve.set_defaults(func=cmdServe)
+
+  args = parser.parse_args(argv)
+  return args.func(args)
+
+
+def fontPaths(paths):
+  from TalkingLeaves.cmap import FONT_SUFFIXES
+  for path in paths:
+    if path.is_dir():
+      yield from sorted(p for p in path.rglob('*') if p.suffix.lower() in FONT_SUFFIXES)
+    else:
+      yield path
+
+
+def loadData():
+  from TalkingLeaves.data import Data
+  start = time.perf_counter()
+  data = Data()
+  log(f"Loaded {len(data.langs)} orthographies in {time.perf_counter() - start:.2f}s")
+  return data
+
+
+def cmdCoverage(args):
+  from TalkingLeaves.cmap import codepointsFromFont, CmapError
+  from TalkingLeaves.data import COVERAGE_FIELDS
+  from TalkingLeaves import export
+
+  data = loadData()
+  start = time.perf_counter()
+  allRecords = []
+  numFonts = 0
+  failed = False
+
+  print('font\tcomplete\ttotal\tcomplete by script')
+  for path in fontPaths(args.fonts):
+    try:
+      codepoints = codepointsFromFont(path)
+    except OSError as e:
+      log(f"{path}: {e}")
+      failed = True
+      continue
+    except CmapError as e:
+      # Names the path already
+      log(e)
+      failed = True
+      continue
+    numFonts += 1
+    records = data.coverageRecords(scriptIds=args.scripts, codepoints=codepoints)
+    printSummary(path, records)
+    if args.output:
+      allRecords.extend(dict(font=str(path), **r) for r in records)
+
+  log(f"Checked {numFonts} fonts in {time.perf_counter() - start:.2f}s")
+  if args.output:
+    export.exportRecords_toPath_(allRecords, args.output, ['font', *COVERAGE_FIELDS])
+    log(f"Wrote {args.output}")
+  return 1 if failed else 0
+
+
+def cmdShape(args):
+  from TalkingLeaves.cmap import codepointsFromFont, CmapError
+  from TalkingLeaves.shaping import checkFont, ShapingError, SHAPING_FIELDS
+  from TalkingLeaves import export
+
+  data = loadData()
+  start = time.perf_counter()
+  allRecords = []
+  numFonts = 0
+  failed = False
+
+  print('font\tok\ttotal\tnotdef\tunpositioned marks\tno joining forms\tmissing features')
+  for path in fontPaths(args.fonts):
+    try:
+      langIds = None
+      if not args.all:
+        records = data.coverageRecords(scriptIds=args.scripts, codepoints=codepointsFromFont(path))
+        langIds = [r['id'] for r in records if r['complete']]
+      records = checkFont(data, path, scriptIds=args.scripts, langIds=langIds, jobs=args.jobs)
+    except OSError as e:
+      log(f"{path}: {e}")
+      failed = True
+      continue
+    except (CmapError, ShapingError) as e:
+      # Names the path already
+      log(e)
+      failed = True
+      continue
+    numFonts += 1
+    counts = [sum(bool(r[key]) for r in records) for key in ('notdef', 'unpositioned', 'unjoined', 'missing_features')]
+    print('\t'.join(str(v) for v in [path, sum(r['ok'] for r in records), len(records), *counts]))
+    if args.output:
+      allRecords.extend(dict(font=str(path), **r) for r in records)
+
+  log(f"Shaped {numFonts} fonts in {time.perf_counter() - start:.2f}s")
+  if args.output:
+    export.exportRecords_toPath_(allRecords, args.output, ['font', *SHAPING_FIELDS])
+    log(f"Wrote {args.output}")
+  return 1 if failed else 0
+
+
+def cmdWatch(args):
+
+  '''
+  Poll the sources, and when one changes, recompute coverage of only the
+  languages that use the codepoints that were added or removed. Prints one
+  JSON object per change, starting with the full coverage of each source.
+  '''
+
+  from TalkingLeaves.inventory import SourceInventory
+
+  data = loadData()
+  scriptIds = set(args.scripts) if args.scripts else None
+  watched = {}
+  for path in args.sources:
+    try:
+      watched[path] = (SourceInventory(path), {})
+    except ValueError as e:
+      log(e)
+      return 1
+
+  log(f"Watching {len(watched)} sources, press Ctrl-C to stop")
+  try:
+    while True:
+      for path, (inventory, coverage) in watched.items():
+        start = time.perf_counter()
+        try:
+          added, removed = inventory.refresh()
+        except OSError as e:
+          log(f"{path}: {e}")
+          continue
+        if coverage and not added and not removed:
+          continue
+
+        if coverage:
+          langIds = data.langIdsUsingChars(chr(c) for c in added | removed)
+          if scriptIds is not None:
+            langIds = {i for i in langIds if data.langRecords[i]['scriptId'] in scriptIds}
+        else:
+          langIds = None
+        records = data.coverageRecords(scriptIds=scriptIds, codepoints=inventory.codepoints, langIds=langIds)
+        changed = [
+          r for r in records
+          if r['id'] not in coverage or coverage[r['id']]['missing'] != r['missing']
+        ]
+        coverage.update((r['id'], r) for r in records)
+
+        print(json.dumps(dict(
+          font=str(path),
+          elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+          added=sorted(added),
+          removed=sorted(removed),
+          complete=sum(r['complete'] for r in coverage.values()),
+          total=len(coverage),
+          changed=[
+            dict(id=r['id'], name=r['name'], scriptId=r['scriptId'], complete=r['complete'], missing=r['missing'])
+            for r in changed
+          ],
+        ), ensure_ascii=False), flush=True)
+      time.sleep(args.interval)
+  except KeyboardInterrupt:
+    return 0
+
+
+def cmdHistory(args):
+  import subprocess
+  from datetime import datetime, timezone
+  from TalkingLeaves.history import SourceHistory
+  from TalkingLeaves import export
+
+  try:
+    sourceHistory = SourceHistory(args.source)
+  except ValueError as e:
+    log(e)
+    return 1
+  except subprocess.CalledProcessError as e:
+    log(f"{args.source}: {e.stderr.strip()}")
+    return 1
+  log(f"Found {len(sourceHistory.revisions)} revisions of {sourceHistory.relPath}")
+
+  data = loadData()
+  start = time.perf_counter()
+  records = []
+  print('commit\tdate\tcomplete\ttotal\tadded\tremoved')
+  for commit, timestamp, added, removed, byScript in sourceHistory.coverage(data, args.scripts, args.jobs):
+    date = datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+    complete = sum(c for c, _ in byScript.values())
+    total = sum(t for _, t in byScript.values())
+    print(f"{commit[:10]}\t{date}\t{complete}\t{total}\t{len(added)}\t{len(removed)}")
+    if args.output:
+      records.extend(
+        dict(commit=commit, date=date, scriptId=scriptId, complete=c, total=t)
+        for scriptId, (c, t) in sorted(byScript.items())
+      )
+
+  log(f"Read {sourceHistory.numScanned} new blobs and checked {len(sourceHistory.revisions)} revisions in {time.perf_counter() - start:.2f}s")
+  if args.output:
+    export.exportRecords_toPath_(records, args.output, ['commit', 'date', 'scriptId', 'complete', 'total'])
+    log(f"Wrote {args.output}")
+  return 0
+
+
+def parseCodepoint(text):
+  if len(text) == 1:
+    return ord(text)
+  upper = text.upper()
+  if upper.startswith('U+') or upper.startswith('0X'):
+    return int(text[2:], 16)
+  raise argparse.ArgumentTypeError(f"{text!r} isn't a char or codepoint")
+
+
+def openStore(args):
+  from TalkingLeaves.store import CoverageStore
+  return CoverageStore(args.db)
+
+
+def cmdDbUpdate(args):
+  from TalkingLeaves.cmap import codepointsFromFont, CmapError
+
+  store = openStore(args)
+  data = loadData()
+  if store.importData(data):
+    log(f"Stored {len(data.langs)} orthographies in {store.path}")
+  start = time.perf_counter()
+  numChecked = 0
+  failed = False
+  found = []
+  for path in fontPaths(args.fonts):
+    path = path.resolve()
+    found.append(path)
+    try:
+      stat = path.stat()
+      if store.fontIsCurrent(path, stat):
+        continue
+      codepoints = codepointsFromFont(path)
+    except OSError as e:
+      log(f"{path}: {e}")
+      failed = True
+      continue
+    except CmapError as e:
+      # Names the path already
+      log(e)
+      failed = True
+      continue
+    store.addFont(path, stat, codepoints, data.coverageRecords(codepoints=codepoints))
+    numChecked += 1
+  numPruned = store.pruneFonts(found, [p.resolve() for p in args.fonts if p.is_dir()])
+  if numChecked or numPruned:
+    store.analyze()
+  log(f"Checked {numChecked} new or changed fonts in {time.perf_counter() - start:.2f}s")
+  if numPruned:
+    log(f"Removed {numPruned} fonts that no longer exist")
+  store.close()
+  return 1 if failed else 0
+
+
+def cmdDbMissing(args):
+  store = openStore(args)
+  printRows(store.langsMissing(args.char, args.lang_status, args.ortho_status))
+  store.close()
+  return 0
+
+
+def cmdDbQuery(args):
+  import sqlite3
+  store = openStore(args)
+  try:
+    printRows(store.query(args.sql))
+  except sqlite3.Error as e:
+    log(e)
+    return 1
+  finally:
+    store.close()
+  return 0
+
+
+def cmdServe(args):
+  from TalkingLeaves.service import CoverageService, makeServer
+
+  service = CoverageService(loadData())
+  server = makeServer(
+    service,
+    host=args.host,
+    port=args.port,
+    socketPath=args.socket,
+    workers=args.workers,
+    verbose=args.verbose,
+  )
+  where = args.socket or f"http://{args.host}:{args.port}"
+  log(f"Serving coverage at {where} with {args.workers} workers, press Ctrl-C to stop")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    if args.socket:
+      args.socket.unlink(missing_ok=True)
+  return 0
+
+
+def printRows(rows):
+  if rows:
+    print('\t'.join(rows[0]))
+  for row in rows:
+    print('\t'.join(str(value) for value in row.values()))
+
+
+def printSummary(path, records):
+  byScript = {}
+  for r in records:
+    complete, total = byScript.get(r['scriptId'], (0, 0))
+    byScript[r['scriptId']] = (complete + r['complete'], total + 1)
+  scripts = ', '.join(
+    f"{scriptId} {complete}/{total}"
+    for scriptId, (complete, total) in sorted(byScript.items(), key=lambda i: -i[1][0])
+    if complete
+  )
+  numComplete = sum(r['complete'] for r in records)
+  print(f"{path}\t{numComplete}\t{len(records)}\t{scripts}")
+
+
+def log(message):
+  print(message, file=sys.stderr)
+
+
+if __name__ == '__main__':
+  sys.exit(main())
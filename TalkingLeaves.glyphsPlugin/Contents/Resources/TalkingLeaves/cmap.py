@@ -0,0 +1,273 @@
+'''
+Read the set of encoded codepoints from compiled fonts (TTF, OTF, TTC,
+WOFF, WOFF2) by parsing only the cmap table, without fontTools.
+
+The file is memory-mapped and only the table directory and the cmap table
+are read, so glyf/CFF data is never touched. The exception is WOFF2, where
+all tables are compressed as one Brotli stream, which has to be decompressed
+up to the end of the cmap table (this needs the brotli module).
+'''
+
+import mmap, os, struct, zlib
+
+FONT_SUFFIXES = ('.ttf', '.otf', '.ttc', '.otc', '.woff', '.woff2')
+
+
+class CmapError(ValueError):
+  pass
+
+
+def codepointsFromFont(path, fontNumber=0):
+
+  '''
+  Return the set of codepoints mapped to a glyph (other than .notdef) in the
+  font at path. For collections, fontNumber picks the font. Fonts that can't
+  be read, including damaged and truncated ones, raise CmapError naming the
+  path.
+  '''
+
+  with open(path, 'rb') as f:
+    # Empty files can't be memory-mapped
+    if os.fstat(f.fileno()).st_size == 0:
+      raise CmapError(f"{path}: file is empty")
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+      try:
+        cmap = cmapTableFromData(data, fontNumber)
+        try:
+          return codepointsFromCmap(cmap)
+        finally:
+          # The mmap can't be closed while a view of it exists
+          cmap.release()
+      except CmapError as e:
+        raise CmapError(f"{path}: {e}")
+      except (struct.error, zlib.error, IndexError) as e:
+        # Offsets or lengths point past the end of the file or table
+        raise CmapError(f"{path}: damaged or truncated font ({e})")
+
+
+def cmapTableFromData(data, fontNumber=0):
+  if len(data) < 12:
+    raise CmapError("file is too short to be a font")
+  signature = bytes(data[:4])
+
+  if signature == b'wOFF':
+    return _cmapFromWoff(data)
+  if signature == b'wOF2':
+    return _cmapFromWoff2(data)
+
+  offset = 0
+  if signature == b'ttcf':
+    numFonts, = struct.unpack_from('>I', data, 8)
+    if not 0 <= fontNumber < numFonts:
+      raise CmapError(f"collection has no font number {fontNumber}")
+    offset, = struct.unpack_from('>I', data, 12 + 4 * fontNumber)
+    signature = bytes(data[offset:offset+4])
+
+  if signature not in (b'\x00\x01\x00\x00', b'OTTO', b'true'):
+    raise CmapError("not a TrueType/OpenType font")
+
+  numTables, = struct.unpack_from('>H', data, offset + 4)
+  for i in range(numTables):
+    tag, _, tableOffset, length = struct.unpack_from('>4sIII', data, offset + 12 + 16 * i)
+    if tag == b'cmap':
+      if tableOffset + length > len(data):
+        raise CmapError("cmap table extends past the end of the file")
+      return memoryview(data)[tableOffset:tableOffset+length]
+  raise CmapError("font has no cmap table")
+
+
+def _cmapFromWoff(data):
+  numTables, = struct.unpack_from('>H', data, 12)
+  for i in range(numTables):
+    tag, offset, compLength, origLength, _ = struct.unpack_from('>4sIIII', data, 44 + 20 * i)
+    if tag == b'cmap':
+      if offset + compLength > len(data):
+        raise CmapError("cmap table extends past the end of the file")
+      table = data[offset:offset+compLength]
+      if compLength < origLength:
+        table = zlib.decompress(table)
+      return memoryview(table)
+  raise CmapError("font has no cmap table")
+
+
+def _cmapFromWoff2(data):
+  try:
+    import brotli
+  except ImportError:
+    raise CmapError("reading WOFF2 fonts requires brotli: pip3 install brotli")
+
+  # Tags of the table directory can be one of 63 "known" tags
+  knownTags = (
+    'cmap head hhea hmtx maxp name OS/2 post cvt  fpgm glyf loca prep CFF  '
+    'VORG EBDT EBLC gasp hdmx kern LTSH PCLT VDMX vhea vmtx BASE GDEF GPOS '
+    'GSUB EBSC JSTF MATH CBDT CBLC COLR CPAL SVG  sbix acnt avar bdat bloc '
+    'bsln cvar fdsc feat fmtx fvar gvar hsty just lcar mort morx opbd prop '
+    'trak Zapf Silf Glat Gloc Feat Sill'
+  )
+  knownTags = [knownTags[i:i+4] for i in range(0, len(knownTags), 5)]
+
+  numTables, = struct.unpack_from('>H', data, 12)
+  if bytes(data[4:8]) == b'ttcf':
+    raise CmapError("WOFF2 collections aren't supported")
+
+  pos = 48
+  streamOffset = 0
+  cmapOffset = None
+  for i in range(numTables):
+    flags = data[pos]
+    pos += 1
+    if flags & 0x3F == 0x3F:
+      tag = bytes(data[pos:pos+4]).decode('latin-1')
+      pos += 4
+    else:
+      tag = knownTags[flags & 0x3F]
+    transformVersion = (flags >> 6) & 0x03
+    origLength, pos = _readUIntBase128(data, pos)
+    length = origLength
+    # glyf and loca are transformed unless the version is 3; other tables
+    # are transformed only if the version isn't 0
+    transformed = transformVersion != 3 if tag in ('glyf', 'loca') else transformVersion != 0
+    if transformed:
+      length, pos = _readUIntBase128(data, pos)
+    if tag == 'cmap':
+      cmapOffset, cmapLength = streamOffset, length
+    streamOffset += length
+
+  if cmapOffset is None:
+    raise CmapError("font has no cmap table")
+
+  # The compressed stream starts right after the table directory. Stop
+  # decompressing once we have the cmap table.
+  totalCompressedSize, = struct.unpack_from('>I', data, 20)
+  decompressor = brotli.Decompressor()
+  stream = bytearray()
+  chunkSize = 1 << 16
+  for chunkStart in range(pos, pos + totalCompressedSize, chunkSize):
+    chunkEnd = min(chunkStart + chunkSize, pos + totalCompressedSize)
+    try:
+      stream += decompressor.process(bytes(data[chunkStart:chunkEnd]))
+    except brotli.error as e:
+      raise CmapError(f"damaged WOFF2 data ({e})")
+    if len(stream) >= cmapOffset + cmapLength:
+      break
+  if len(stream) < cmapOffset + cmapLength:
+    raise CmapError("WOFF2 data ends before the cmap table")
+  return memoryview(bytes(stream[cmapOffset:cmapOffset+cmapLength]))
+
+
+def _readUIntBase128(data, pos):
+  value = 0
+  for i in range(5):
+    byte = data[pos]
+    pos += 1
+    value = (value << 7) | (byte & 0x7F)
+    if not byte & 0x80:
+      return value, pos
+  raise CmapError("invalid UIntBase128 value")
+
+
+def codepointsFromCmap(cmap):
+
+  '''
+  Union of the codepoints of all Unicode subtables (platform 0, or platform
+  3 with encoding 1 or 10) of a cmap table
+  '''
+
+  numSubtables, = struct.unpack_from('>H', cmap, 2)
+  offsets = set()
+  for i in range(numSubtables):
+    platformId, encodingId, offset = struct.unpack_from('>HHI', cmap, 4 + 8 * i)
+    if platformId == 0 or (platformId == 3 and encodingId in (1, 10)):
+      offsets.add(offset)
+
+  codepoints = set()
+  for offset in offsets:
+    subtableFormat, = struct.unpack_from('>H', cmap, offset)
+    parser = _SUBTABLE_PARSERS.get(subtableFormat)
+    if parser:
+      codepoints.update(parser(cmap, offset))
+  return codepoints
+
+
+def _format0(cmap, offset):
+  glyphIds = cmap[offset+6:offset+6+256]
+  return {c for c in range(256) if glyphIds[c]}
+
+
+def _format4(cmap, offset):
+  segCountX2, = struct.unpack_from('>H', cmap, offset + 6)
+  segCount = segCountX2 // 2
+  endsPos = offset + 14
+  startsPos = endsPos + segCountX2 + 2
+  deltasPos = startsPos + segCountX2
+  rangeOffsetsPos = deltasPos + segCountX2
+  ends = struct.unpack_from(f'>{segCount}H', cmap, endsPos)
+  starts = struct.unpack_from(f'>{segCount}H', cmap, startsPos)
+  deltas = struct.unpack_from(f'>{segCount}H', cmap, deltasPos)
+  rangeOffsets = struct.unpack_from(f'>{segCount}H', cmap, rangeOffsetsPos)
+
+  codepoints = set()
+  for i in range(segCount):
+    start, end, delta, rangeOffset = starts[i], ends[i], deltas[i], rangeOffsets[i]
+    if start == 0xFFFF:
+      continue
+    if rangeOffset == 0:
+      codepoints.update(range(start, end + 1))
+      # The one char (if any) that the delta wraps to glyph 0 isn't mapped
+      notdef = (0x10000 - delta) & 0xFFFF
+      if start <= notdef <= end:
+        codepoints.discard(notdef)
+    else:
+      # Glyph ids are in glyphIdArray, at an offset relative to this
+      # segment's idRangeOffset entry
+      glyphIdsPos = rangeOffsetsPos + 2 * i + rangeOffset
+      count = end - start + 1
+      if glyphIdsPos + 2 * count > len(cmap):
+        count = max(0, (len(cmap) - glyphIdsPos) // 2)
+      glyphIds = struct.unpack_from(f'>{count}H', cmap, glyphIdsPos)
+      codepoints.update(
+        start + j for j, g in enumerate(glyphIds) if g and (g + delta) & 0xFFFF
+      )
+  return codepoints
+
+
+def _format6(cmap, offset):
+  firstCode, entryCount = struct.unpack_from('>HH', cmap, offset + 6)
+  glyphIds = struct.unpack_from(f'>{entryCount}H', cmap, offset + 10)
+  return {firstCode + i for i, g in enumerate(glyphIds) if g}
+
+
+def _format10(cmap, offset):
+  startCharCode, numChars = struct.unpack_from('>II', cmap, offset + 12)
+  glyphIds = struct.unpack_from(f'>{numChars}H', cmap, offset + 20)
+  return {startCharCode + i for i, g in enumerate(glyphIds) if g}
+
+
+def _format12(cmap, offset, manyToOne=False):
+  numGroups, = struct.unpack_from('>I', cmap, offset + 12)
+  codepoints = set()
+  for i in range(numGroups):
+    start, end, startGlyphId = struct.unpack_from('>III', cmap, offset + 16 + 12 * i)
+    end = min(end, 0x10FFFF)
+    codepoints.update(range(start, end + 1))
+    if startGlyphId == 0:
+      # Format 13 maps the whole group to glyph 0, format 12 only the first
+      if manyToOne:
+        codepoints.difference_update(range(start, end + 1))
+      else:
+        codepoints.discard(start)
+  return codepoints
+
+
+def _format13(cmap, offset):
+  return _format12(cmap, offset, manyToOne=True)
+
+
+_SUBTABLE_PARSERS = {
+  0: _format0,
+  4: _format4,
+  6: _format6,
+  10: _format10,
+  12: _format12,
+  13: _format13,
+}
@@ -0,0 +1,303 @@
+'''
+Everything the TalkingLeaves window does that doesn't involve widgets: which
+languages are shown, which of them are selected, and what adding their
+missing glyphs does to the font. The window (window.py) passes user actions
+to a Controller and shows its state, so the same workflows can also be run
+and timed without AppKit (see dev/replay.py).
+'''
+
+import difflib, unicodedata
+from TalkingLeaves.selection import SelectionModel
+from TalkingLeaves.recipes import RecipeGraph
+import TalkingLeaves.windowstate as windowstate
+
+
+def addDottedCircles(chars):
+  for i, char in enumerate(chars):
+    if unicodedata.combining(char):
+      chars[i] = '◌' + char
+  return chars
+
+
+def coverageText(scriptName, query, numComplete, numIncomplete):
+  query = query.strip()
+  if query:
+    scriptName = f"languages matching “{query}”"
+  total = numComplete + numIncomplete
+
+  return "{completed}/{total} = {percent}% {script} completed".format(
+    script=scriptName,
+    total=total,
+    completed=numComplete,
+    percent=numComplete * 100 // total if total else 0,
+  )
+
+
+def rowChanges(oldRows, newRows):
+
+  '''
+  How to turn oldRows into newRows, matching rows by id: the indexes of the
+  old rows to remove, then the indexes of the new rows to insert, and the
+  indexes of new rows that were kept but have other values
+  '''
+
+  matcher = difflib.SequenceMatcher(
+    None, [row['id'] for row in oldRows], [row['id'] for row in newRows], autojunk=False
+  )
+  removed, inserted, changed = [], [], []
+  for op, i1, i2, j1, j2 in matcher.get_opcodes():
+    if op == 'equal':
+      changed.extend(j for i, j in zip(range(i1, i2), range(j1, j2)) if oldRows[i] != newRows[j])
+    else:
+      removed.extend(range(i1, i2))
+      inserted.extend(range(j1, j2))
+  return removed, inserted, changed
+
+
+class Controller:
+
+  '''
+  State of a TalkingLeaves window. Actions that change what the languages
+  table shows refresh self.rows (right away, or when self.refresher delivers
+  the result), which the view then displays, updating only the rows that
+  changed. Selected rows that are still there stay selected, and the view
+  changes the selection with selectLangs().
+  '''
+
+  def __init__(self, data, font):
+    self.data = data
+    self.font = font
+    self.recipes = RecipeGraph(data, font)
+    self.selection = SelectionModel()
+    self.scriptRows = data.scriptsAsTable()
+    self.scriptName = self.scriptRows[0]['name'] if self.scriptRows else None
+    self.query = ''
+    self.showComplete = False
+    self.showIncomplete = True
+    self.rows = []
+    self.numComplete = 0
+    self.numIncomplete = 0
+    # Chars of each lang in self.rows that are present in the font
+    self.completeChars = {}
+    # The snapshot that self.rows were computed for
+    self.rowsState = None
+    # A RefreshScheduler, to refresh in the background (see requestRefresh)
+    self.refresher = None
+
+  # Actions
+
+  def selectScript(self, scriptName):
+    # Picking a script leaves search mode
+    self.scriptName = scriptName
+    self.query = ''
+    self.requestRefresh()
+
+  def setQuery(self, query):
+    self.query = query
+    self.requestRefresh()
+
+  def setShowComplete(self, value):
+    self.showComplete = bool(value)
+    self.requestRefresh()
+
+  def setShowIncomplete(self, value):
+    self.showIncomplete = bool(value)
+    self.requestRefresh()
+
+  def requestRefresh(self, delay=None):
+
+    '''
+    Refresh through self.refresher, which coalesces rapid requests and
+    computes in the background, or right away if there isn't one. With a
+    refresher, rows change when it delivers the result to applyRows.
+    '''
+
+    if self.refresher is None:
+      self.refresh()
+    else:
+      self.refresher.request(delay)
+
+  def refresh(self):
+
+    '''
+    Load/reload languages for the current script or search, e.g. when the
+    font may have changed
+    '''
+
+    self.applyRows(self.computeRows(self.snapshot()))
+
+  def snapshot(self):
+
+    '''
+    Everything computeRows needs, taken on the main thread: the ids of the
+    langs to show (searching isn't thread safe), the font's glyph names, and
+    the glyph name of each char it will check (which Glyphs works out from
+    the font), so that computeRows can run off the main thread without
+    touching the search index, the font or the Glyphs API
+    '''
+
+    langIds = self.data.langIdsForTable(self.scriptName, self.query)
+    return dict(
+      scriptName=self.scriptName,
+      query=self.query,
+      langIds=langIds,
+      showComplete=self.showComplete,
+      showIncomplete=self.showIncomplete,
+      glyphNames=frozenset(g.name for g in self.font.glyphs),
+      charNames=self.data.glyphNamesForChars(self.data.charsForTable(langIds), self.font),
+    )
+
+  def computeRows(self, state):
+
+    '''
+    Rows for a snapshot. Returns everything the rows need, for applyRows to
+    store on the main thread, rather than storing anything itself.
+    '''
+
+    rows, completeChars, numComplete, numIncomplete = self.data.langsAsTable(
+      langIds=state['langIds'],
+      font=None,
+      showIncomplete=state['showIncomplete'],
+      showComplete=state['showComplete'],
+      ranked=bool(state['query'].strip()),
+      glyphNames=state['glyphNames'],
+      charNames=state['charNames'],
+    )
+    return rows, numComplete, numIncomplete, completeChars, state
+
+  def applyRows(self, result):
+
+    '''
+    Use newly computed rows, and return how they differ from the ones shown
+    (see rowChanges), or None if they don't, so that the view only has to
+    update the rows that changed. Rows that are still there stay selected.
+    '''
+
+    rows, self.numComplete, self.numIncomplete, self.completeChars, self.rowsState = result
+    if rows == self.rows:
+      return None
+    changes = rowChanges(self.rows, rows)
+    self.rows = rows
+    self.selection.updateRows(rows)
+    return changes
+
+  def selectLangs(self, indexes):
+    self.selection.select(indexes)
+
+  def addGlyphs(self, makeComponents=True):
+
+    '''
+    Add missing glyphs of the selected languages to the font, components
+    before the composites that are built from them, and return the plan
+    '''
+
+    from GlyphsApp import GSGlyph
+
+    plan = self.planNewGlyphs()
+    for name in plan.order:
+      self.font.glyphs.append(GSGlyph(plan.chars[name]))
+    if makeComponents:
+      for name in plan.composites:
+        for layer in self.font.glyphs[name].layers:
+          layer.makeComponents()
+    self.requestRefresh(delay=0)
+    return plan
+
+  def restore(self, saved):
+
+    '''
+    Pick up where a saved window (see windowstate.py) left off: its script,
+    search, filters and rows. Restored rows are shown until a refresh finds
+    that something changed, even if they're stale.
+    '''
+
+    state = saved['state']
+    if any(row['name'] == state['scriptName'] for row in self.scriptRows):
+      self.scriptName = state['scriptName']
+    self.query = state['query']
+    self.showComplete = state['showComplete']
+    self.showIncomplete = state['showIncomplete']
+    self.applyRows((saved['rows'], saved['numComplete'], saved['numIncomplete'], saved['completeChars'], self.snapshot()))
+    if saved['stale']:
+      # They weren't computed for the font as it is, so don't save them again
+      self.rowsState = None
+
+  def savedWindow(self):
+
+    '''
+    What to save for restore(), or None if no rows were computed yet. The
+    state saved is the one the rows were computed for, even if a refresh is
+    still pending.
+    '''
+
+    if self.rowsState is None:
+      return None
+    state = dict(self.rowsState)
+    glyphNames = state.pop('glyphNames')
+    del state['charNames']
+    del state['langIds']
+    return dict(
+      fingerprint=windowstate.fingerprint(glyphNames),
+      state=state,
+      scriptRows=self.scriptRows,
+      rows=self.rows,
+      numComplete=self.numComplete,
+      numIncomplete=self.numIncomplete,
+      completeChars=self.completeChars,
+    )
+
+  # State
+
+  def statusText(self):
+
+    '''
+    Some useful info for the bottom of the window
+    '''
+
+    m = coverageText(self.scriptName, self.query, self.numComplete, self.numIncomplete)
+    if self.selection.numSelected:
+      m += " ({langs} langs, {chars} missing chars selected)".format(
+        langs=self.selection.numSelected,
+        chars=self.selection.numMissingChars,
+      )
+    return m
+
+  def selectedLangNames(self):
+    return [row['name'] for row in self.selection.selectedRows()]
+
+  def selectedMissingChars(self, marksAddDottedCircles=False):
+    chars = list(self.selection.missing)
+
+    if marksAddDottedCircles:
+      chars = addDottedCircles(chars)
+
+    return sorted(chars)
+
+  def selectedCompleteChars(self, marksAddDottedCircles=False):
+    chars = set()
+    for row in self.selection.selectedRows():
+      chars.update(self.completeChars.get(row['id'], ()))
+    chars = sorted(chars)
+
+    if marksAddDottedCircles:
+      chars = addDottedCircles(chars)
+
+    return chars
+
+  def planNewGlyphs(self):
+
+    '''
+    Plan adding the missing glyphs of the selected languages. Chars whose
+    codepoint is already in the font (under a different name) are skipped.
+    '''
+
+    charset = {g.string for g in self.font.glyphs if g.unicode}
+    glyphset = {g.name for g in self.font.glyphs}
+    chars = [c for c in self.selectedMissingChars() if c not in charset]
+    return self.recipes.plan(chars, glyphset)
+
+  def coverageRecords(self, scriptIds=None):
+    return self.data.coverageRecords(self.font, scriptIds=scriptIds)
+
+  def coverageMatrix(self):
+    return self.data.coverageMatrix(self.scriptName, self.font)
@@ -1,5 +1,23 @@
+import math, os, pickle
 import pandas as pd
-from GlyphsApp import Glyphs
+from TalkingLeaves.search import SearchIndex
+from TalkingLeaves.matrix import CoverageMatrix
+import TalkingLeaves.utils as utils
+
+# Bump this whenever the format of lang/script records changes, so that
+# cached sources are reloaded
+CACHE_FORMAT = 2
+
+# Chunks of languages per CPU when loading Hyperglot without a cache, so
+# that a slow chunk doesn't leave the other workers idle
+HYPERGLOT_CHUNKS_PER_CPU = 4
+
+# Fields of the records of Data.coverageRecords, in order
+COVERAGE_FIELDS = (
+  'id', 'iso', 'name', 'script', 'scriptId', 'speakers', 'ortho_status',
+  'lang_status', 'complete', 'total_chars', 'missing_count', 'missing',
+  'missing_codepoints',
+)
 
 
 class Data:
@@ -8,8 +26,13 @@ class Data:
   Collection of languages and scripts.
   '''
 
-  def __init__(self):
-    self.loadFromSource(DataSourceHyperglot)
+  def __init__(self, sources=None):
+    self._glyphInfos = {}
+
+    if sources is None:
+      from TalkingLeaves.sources import defaultSources
+      sources = defaultSources()
+    self.loadFromSources(sources)
 
   def __repr__(self):
     text = "Languages: \n"
@@ -18,9 +41,50 @@ class Data:
     return text
 
   def loadFromSource(self, dataSource):
-    ds = dataSource()
-    self.langs = pd.DataFrame(ds.langs.values())
-    self.scripts = pd.DataFrame(ds.scripts.values())
+    self.loadFromSources([dataSource()])
+
+  def loadFromSources(self, dataSources):
+
+    '''
+    Merge the records of several (already loaded) data sources, then build
+    the tables and indexes once
+    '''
+
+    langs = {}
+    scripts = {}
+    for ds in dataSources:
+      langs.update(ds.langs)
+      for scriptId, script in ds.scripts.items():
+        if scriptId in scripts:
+          scripts[scriptId] = dict(
+            scripts[scriptId],
+            speakers=scripts[scriptId]['speakers'] + script['speakers'],
+          )
+        else:
+          scripts[scriptId] = script
+
+    # Many orthographies have exactly the same chars. Keep one list per
+    # distinct set in self.charSets, shared by the records that use it and
+    # found by their charSetId, so that coverage is worked out once per set.
+    self.charSets = []
+    setIds = {}
+    for lang in langs.values():
+      key = tuple(lang['chars'])
+      if key not in setIds:
+        setIds[key] = len(self.charSets)
+        self.charSets.append(lang['chars'])
+      lang['charSetId'] = setIds[key]
+      lang['chars'] = self.charSets[setIds[key]]
+
+    self.sources = dataSources
+    self.langRecords = langs
+    self.langs = pd.DataFrame(langs.values())
+    self.langs.index = self.langs['id'].values
+    self.scripts = pd.DataFrame(scripts.values())
+    self.search = SearchIndex(
+      langs.values(),
+      scriptNames={s['id']: s['name'] for s in scripts.values()},
+    )
 
   def scriptsAsDict(self):
     frame = self.scripts.filter(['name', 'speakers']).sort_values('speakers', ascending=False)
@@ -40,94 +104,303 @@ class Data:
       self.scripts.filter(['name', 'speakers']).sort_values('speakers', ascending=False)
     )
 
-  def langsAsTable(self, scriptName, font, showIncomplete, showComplete):
-    scriptId = self.scripts[self.scripts['name'] == scriptName].reset_index().at[0, 'id']
-    frame = self.langs[self.langs['scriptId'] == scriptId]
-    frame = frame.filter(['name', 'speakers', 'ortho_status', 'lang_status', 'chars'])
+  def scriptIdForName(self, scriptName):
+    return self.scripts[self.scripts['name'] == scriptName].reset_index().at[0, 'id']
+
+  def glyphInfoForChar(self, char, font):
+
+    '''
+    Glyph info lookups are slow, and the same chars are looked up over and
+    over, so remember the info for each char.
+    '''
+
+    key = (char, id(font))
+    if key not in self._glyphInfos:
+      from GlyphsApp import Glyphs
+      self._glyphInfos[key] = Glyphs.glyphInfoForUnicode(ord(char), font)
+    return self._glyphInfos[key]
+
+  def glyphNameForChar(self, char, font):
+    return self.glyphInfoForChar(char, font).name
+
+  def glyphNamesForChars(self, chars, font):
+
+    '''
+    Map chars to their glyph names in the font. This asks Glyphs, so call it
+    on the main thread, and pass the result to code that runs elsewhere.
+    '''
+
+    return {c: self.glyphNameForChar(c, font) for c in set(chars)}
+
+  def missingFromFont(self, charLists, font, glyphNames=None, charNames=None):
+
+    '''
+    Map each char in charLists to True if it's missing from the font. Many
+    langs share the same chars, so each char is only checked once. Off the
+    main thread, pass a snapshot of the font's glyphNames, and charNames
+    from glyphNamesForChars, so that neither the font nor Glyphs is used.
+    '''
+
+    glyphs = font.glyphs if glyphNames is None else glyphNames
+    missing = {}
+    for chars in charLists:
+      for c in chars:
+        if c not in missing:
+          name = self.glyphNameForChar(c, font) if charNames is None else charNames[c]
+          missing[c] = name not in glyphs
+    return missing
+
+  def missingFromCodepoints(self, charLists, codepoints):
+
+    '''
+    Like missingFromFont, but for a set of codepoints, e.g. from the cmap of
+    a compiled font (see cmap.py)
+    '''
+
+    missing = {}
+    for chars in charLists:
+      for c in chars:
+        if c not in missing:
+          missing[c] = ord(c) not in codepoints
+    return missing
+
+  def coverageOfCharSets(self, setIds, font=None, codepoints=None, glyphNames=None, charNames=None):
+
+    '''
+    Map each of setIds to the (present, missing) chars of its char set,
+    checked against a Glyphs font, or a set of codepoints. Sets shared by
+    many langs are only split once.
+    '''
+
+    setIds = set(setIds)
+    charLists = [self.charSets[i] for i in setIds]
+    if codepoints is not None:
+      missing = self.missingFromCodepoints(charLists, codepoints)
+    else:
+      missing = self.missingFromFont(charLists, font, glyphNames, charNames)
+
+    coverage = {}
+    for i in setIds:
+      chars = self.charSets[i]
+      coverage[i] = (
+        [c for c in chars if not missing[c]],
+        [c for c in chars if missing[c]],
+      )
+    return coverage
 
-    # Keep only chars that are missing from the font
-    for y in frame.index:
-      frame.at[y, 'chars'] = CharList([
-        c for c in frame.at[y, 'chars']
-        if Glyphs.glyphInfoForUnicode(ord(c), font).name not in font.glyphs
-      ])
+  def langIdsUsingChars(self, chars):
+
+    '''
+    Ids of the langs that use any of chars, i.e. whose coverage can change
+    when those chars are added to or removed from a font
+    '''
+
+    ids = set()
+    for char in chars:
+      ids.update(self.search.charIndex.get(char, ()))
+    return ids
+
+  def coverageRecords(self, font=None, scriptIds=None, codepoints=None, langIds=None):
+
+    '''
+    One record per orthography with its full coverage, for exporting. Unlike
+    langsAsTable, nothing is truncated, filtered or formatted for display.
+    Coverage is checked against a Glyphs font, or a set of codepoints.
+    Records can be limited to some langIds, e.g. from langIdsUsingChars.
+    '''
+
+    if langIds is None:
+      langs = list(self.langRecords.values())
+    else:
+      langs = [self.langRecords[i] for i in sorted(langIds)]
+    if scriptIds is not None:
+      scriptIds = set(scriptIds)
+      langs = [lang for lang in langs if lang['scriptId'] in scriptIds]
+    scriptNames = dict(zip(self.scripts['id'], self.scripts['name']))
+    coverage = self.coverageOfCharSets([lang['charSetId'] for lang in langs], font, codepoints)
+    missingCodepoints = {
+      i: [ord(c) for c in missingChars] for i, (_, missingChars) in coverage.items()
+    }
+
+    records = []
+    for lang in langs:
+      missingChars = coverage[lang['charSetId']][1]
+      records.append(dict(
+        id=lang['id'],
+        iso=lang['iso'],
+        name=lang['name'],
+        script=scriptNames.get(lang['scriptId'], lang['scriptId']),
+        scriptId=lang['scriptId'],
+        speakers=lang['speakers'],
+        ortho_status=lang['ortho_status'],
+        lang_status=lang['lang_status'],
+        complete=not missingChars,
+        total_chars=len(lang['chars']),
+        missing_count=len(missingChars),
+        missing=missingChars,
+        missing_codepoints=missingCodepoints[lang['charSetId']],
+      ))
+    return records
+
+  def coverageMatrix(self, scriptName, font):
+    scriptId = self.scriptIdForName(scriptName)
+    langs = [lang for lang in self.langRecords.values() if lang['scriptId'] == scriptId]
+    charLists = [self.charSets[i] for i in {lang['charSetId'] for lang in langs}]
+    return CoverageMatrix(langs, self.missingFromFont(charLists, font))
+
+  def langIdsForTable(self, scriptName, query=''):
+
+    '''
+    Ids of the langs of a script, or of the langs of all scripts that match
+    query, in the order of their search ranking. The search index keeps the
+    last query's results, so this is only called from the main thread.
+    '''
+
+    if query.strip():
+      return self.search.search(query)
+    return list(self.langs.index[self.langs['scriptId'] == self.scriptIdForName(scriptName)])
+
+  def charsForTable(self, langIds):
+
+    '''
+    All chars of langs, e.g. for glyphNamesForChars
+    '''
+
+    chars = set()
+    for i in set(self.langs.loc[langIds, 'charSetId']):
+      chars.update(self.charSets[i])
+    return chars
+
+  def langsAsTable(self, langIds, font, showIncomplete, showComplete, ranked=False, glyphNames=None, charNames=None):
+
+    '''
+    Rows of the languages table for langIds (see langIdsForTable), and the
+    chars of each of its langs that are present in the font (by lang id),
+    and the numbers of complete and incomplete langs. Ranked langs keep
+    their order, others are sorted by missing chars. Nothing is stored on
+    self, so this can run off the main thread, given glyphNames and
+    charNames (see missingFromFont).
+    '''
+
+    frame = self.langs.loc[langIds]
+    frame = frame.filter(['name', 'scriptId', 'speakers', 'ortho_status', 'lang_status', 'chars', 'id', 'charSetId'])
+
+    # Keep only chars that are missing from the font, and remember the rest
+    coverage = self.coverageOfCharSets(frame['charSetId'], font, glyphNames=glyphNames, charNames=charNames)
+    missingLists = {i: CharList(missingChars) for i, (_, missingChars) in coverage.items()}
+    completeChars = {
+      langId: coverage[setId][0] for langId, setId in zip(frame['id'], frame['charSetId'])
+    }
+    frame['chars'] = [missingLists[i] for i in frame['charSetId']]
+    frame = frame.drop(columns='charSetId')
 
     # Optionally hide langs with incomplete/complete char sets
-    self.completeLangs = frame[frame['chars'] == '']
-    self.incompleteLangs = frame[frame['chars'] != '']
+    completeLangs = frame[frame['chars'] == '']
+    incompleteLangs = frame[frame['chars'] != '']
     if not showIncomplete:
-      frame = self.completeLangs
+      frame = completeLangs
     if not showComplete:
-      frame = self.incompleteLangs
+      frame = incompleteLangs
 
-    frame = frame.sort_values('chars')
+    if not ranked:
+      frame = frame.sort_values('chars')
 
-    return self.tableFromFrame(frame)
+    return self.tableFromFrame(frame), completeChars, len(completeLangs), len(incompleteLangs)
 
 
 class DataSource:
 
+  '''
+  Base class for sources of languages (or character sets) and scripts.
+
+  Subclasses implement load(), filling self.langs and self.scripts with
+  records keyed by id. If cacheKey() returns anything but None, records are
+  saved to disk and loaded from there next time, until the key changes.
+  '''
+
   def __init__(self):
     self.scripts = {}
     self.langs = {}
-    self.load()
+    if not self.loadFromCache():
+      self.load()
+      self.saveToCache()
+
+  def cacheKey(self):
+    return None
+
+  def cacheName(self):
+    return type(self).__name__
+
+  def cachePath(self):
+    return utils.cacheDir() / 'sources' / f"{self.cacheName()}.pickle"
+
+  def loadFromCache(self):
+    key = self.cacheKey()
+    if key is None:
+      return False
+    try:
+      with open(self.cachePath(), 'rb') as f:
+        cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+      return False
+    if cached.get('key') != (CACHE_FORMAT, key):
+      return False
+    self.langs = cached['langs']
+    self.scripts = cached['scripts']
+    return True
+
+  def saveToCache(self):
+    key = self.cacheKey()
+    if key is None:
+      return
+    path = self.cachePath()
+    try:
+      path.parent.mkdir(parents=True, exist_ok=True)
+      with open(path.with_suffix('.tmp'), 'wb') as f:
+        pickle.dump(
+          dict(key=(CACHE_FORMAT, key), langs=self.langs, scripts=self.scripts),
+          f,
+          protocol=pickle.HIGHEST_PROTOCOL,
+        )
+      path.with_suffix('.tmp').replace(path)
+    except OSError:
+      # Not critical, we'll just load from source again next time
+      pass
 
 
 class DataSourceHyperglot(DataSource):
 
-  def load(self):
+  def cacheKey(self):
     import hyperglot
+    return hyperglot.__version__
+
+  def load(self):
+
+    '''
+    Build the records of each language in chunks, in worker processes if
+    possible (see hyperglotrecords.py). Chunks are merged in Hyperglot's
+    order, so ids and script speakers are the same however they were built.
+    '''
+
     import hyperglot.languages
-    import hyperglot.language
-    import hyperglot.orthography
-    from hyperglot.loader import load_scripts_data
-
-    self._scriptNames = load_scripts_data()
-
-    hg = hyperglot.languages.Languages()
-    for iso in hg.keys():
-      lang = hyperglot.language.Language(iso)
-      for i, orthoData in enumerate(lang.get('orthographies', [])):
-        ortho = hyperglot.orthography.Orthography(orthoData)
-
-        scriptId = self._scriptNameToIso(ortho.script)
-
-        langId = f"{iso}_{i}_{scriptId}"
-
-        # Hyperglot's Language class uses dict for raw data
-        # and attributes for cleaned data.
-
-        # We need raw data in some cases, i.e. to distinguish between 0 and
-        # None for speakers, so the user can see whether speakers is explicitly
-        # zero, or there's no data. Similarly, status defaults to 'living'
-        # if undefined, but we will take a slightly different approach by
-        # assuming 'living' only if speakers is > 0.
-
-        speakers = -1 if lang['speakers'] is None else lang.speakers
-        self.langs[langId] = dict(
-          id=langId,
-          iso=iso,
-          name=lang.get_name(),
-          scriptId=self._scriptNameToIso(ortho.script),
-          lang_status='' if lang['status'] is None and speakers <= 0 else lang.status,
-          ortho_status='' if ortho['status'] is None else ortho.status,
-          speakers=speakers,
-          chars=sorted(set(ortho.base_chars)) + sorted(set(ortho.base_marks)),
-        )
+    from TalkingLeaves.hyperglotrecords import recordsForIsos_
 
+    isos = list(hyperglot.languages.Languages().keys())
+    size = math.ceil(len(isos) / ((os.cpu_count() or 1) * HYPERGLOT_CHUNKS_PER_CPU)) or 1
+    chunks = [isos[i:i + size] for i in range(0, len(isos), size)]
+
+    for records in utils.mapInProcesses_(recordsForIsos_, chunks):
+      for record, scriptName, langSpeakers in records:
+        self.langs[record['id']] = record
+        scriptId = record['scriptId']
         if scriptId not in self.scripts:
           self.scripts[scriptId] = dict(
             id=scriptId,
-            name=ortho.script,
-            speakers=lang.get('speakers', 0) or 0,
+            name=scriptName,
+            speakers=langSpeakers,
           )
-        elif self.langs[langId]['ortho_status'] == 'primary':
-          self.scripts[scriptId]['speakers'] += lang.get('speakers', 0) or 0
-
-  def _scriptNameToIso(self, name):
-    if name not in self._scriptNames:
-      return name
-    return self._scriptNames[name]['iso_15924']
+        elif record['ortho_status'] == 'primary':
+          self.scripts[scriptId]['speakers'] += langSpeakers
 
 
 class CharList(str):
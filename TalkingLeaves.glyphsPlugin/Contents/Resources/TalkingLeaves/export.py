@@ -0,0 +1,77 @@
+'''
+Write coverage records (see Data.coverageRecords, SourceHistory, or
+shaping.checkFont) to files. The format is chosen by the file extension.
+'''
+
+import csv, json, pathlib
+
+FORMATS = {
+  'tsv': 'Tab-separated values',
+  'csv': 'Comma-separated values',
+  'json': 'JSON',
+  'parquet': 'Apache Parquet',
+}
+
+
+def exportRecords_toPath_(records, path, fieldnames=None):
+
+  '''
+  fieldnames are the columns, in order. They default to the keys of the
+  first record, but without them a file with no records has no columns.
+  '''
+
+  path = pathlib.Path(path)
+  fmt = path.suffix.lstrip('.').lower()
+  if fmt not in FORMATS:
+    raise ValueError(f"Can't export to .{fmt} files, use one of: {', '.join(FORMATS)}")
+  writers = dict(
+    tsv=writeDelimited,
+    csv=writeDelimited,
+    json=writeJson,
+    parquet=writeParquet,
+  )
+  writers[fmt](records, path, fieldnames)
+
+
+def flatRecord(record):
+
+  '''
+  Spreadsheets can't hold lists, so join lists (like missing chars and
+  codepoints) into space separated strings
+  '''
+
+  flat = dict(record)
+  for key, value in record.items():
+    if key == 'missing_codepoints':
+      flat[key] = ' '.join(f"U+{cp:04X}" for cp in value)
+    elif isinstance(value, list):
+      flat[key] = ' '.join(map(str, value))
+  return flat
+
+
+def writeDelimited(records, path, fieldnames=None):
+  dialect = 'excel-tab' if path.suffix.lower() == '.tsv' else 'excel'
+  records = iter(records)
+  first = next(records, None)
+  if fieldnames is None:
+    fieldnames = [] if first is None else list(first)
+  with open(path, 'w', encoding='utf-8', newline='') as f:
+    writer = csv.DictWriter(f, fieldnames=list(fieldnames), dialect=dialect)
+    writer.writeheader()
+    if first is not None:
+      writer.writerow(flatRecord(first))
+    for record in records:
+      writer.writerow(flatRecord(record))
+
+
+def writeJson(records, path, fieldnames=None):
+  with open(path, 'w', encoding='utf-8') as f:
+    json.dump(list(records), f, ensure_ascii=False, indent=1)
+
+
+def writeParquet(records, path, fieldnames=None):
+  import pandas as pd
+  try:
+    pd.DataFrame(list(records), columns=fieldnames).to_parquet(path, index=False)
+  except ImportError:
+    raise ImportError("Exporting Parquet files requires pyarrow: pip3 install pyarrow")
@@ -0,0 +1,237 @@
+'''
+Language coverage of a font source (.glyphs, .glyphspackage, .ufo) over its
+git history.
+
+The history is read with a single `git log --raw`, which lists the blob hash
+of every file that changed in each commit. A blob never changes, so the
+codepoints found in it are cached by its hash, and only blobs that haven't
+been seen before are read (with `git cat-file`) and scanned, in parallel.
+Coverage is then carried from one revision to the next, rechecking only the
+languages that use codepoints that were added or removed.
+'''
+
+import math, os, pathlib, pickle, subprocess
+from collections import Counter
+from TalkingLeaves.inventory import SOURCE_SUFFIXES, glyphsInventoryFromText, glifCodepointsFromText
+import TalkingLeaves.utils as utils
+
+# Bump this whenever the way blobs are scanned changes
+CACHE_FORMAT = 1
+
+# Chunks of blobs given to each worker process, per worker
+CHUNKS_PER_JOB = 4
+
+
+def git(repo, *args):
+  return subprocess.run(
+    ['git', '-C', str(repo), *args],
+    check=True, capture_output=True, text=True,
+  ).stdout
+
+
+def codepointsFromBlob(suffix, text):
+  try:
+    if suffix == '.glif':
+      codes = glifCodepointsFromText(text)
+    else:
+      # .glyph files only exist in Glyphs 3 packages
+      formatVersion = 3 if suffix == '.glyph' else None
+      inventory = glyphsInventoryFromText(text, formatVersion)
+      codes = [c for glyphCodes in inventory.values() for c in glyphCodes]
+  except ValueError:
+    # Unparseable codepoint, e.g. a file committed with merge conflicts
+    return ()
+  return tuple(sorted({c for c in codes if c <= 0x10FFFF}))
+
+
+def codepointsFromBlobs_(chunk):
+
+  '''
+  Read the blobs of a (repo, blobs) chunk, given as (hash, suffix) pairs,
+  through one `git cat-file` process, and return the codepoints in each, by
+  (hash, suffix). This is the work done by each worker process.
+  '''
+
+  repo, blobs = chunk
+  result = {}
+  with subprocess.Popen(
+    ['git', '-C', str(repo), 'cat-file', '--batch'],
+    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+  ) as proc:
+    for blob, suffix in blobs:
+      proc.stdin.write(f"{blob}\n".encode())
+      proc.stdin.flush()
+      # "<hash> blob <size>", or "<hash> missing"
+      header = proc.stdout.readline().split()
+      if len(header) < 3:
+        result[(blob, suffix)] = ()
+        continue
+      content = proc.stdout.read(int(header[2]) + 1)[:-1]
+      result[(blob, suffix)] = codepointsFromBlob(suffix, content.decode('utf-8', 'replace'))
+    proc.stdin.close()
+  return result
+
+
+class SourceHistory:
+
+  '''
+  The revisions of a font source in its git repository. Each revision is
+  (commit, timestamp, changes), oldest first, where changes maps the source's
+  files that changed in that commit to their new blob hash, or None if they
+  were deleted. Only the first parent of merges is followed, so that the
+  changes of each commit apply on top of the previous one.
+  '''
+
+  def __init__(self, path):
+    path = pathlib.Path(path).resolve()
+    self.kind = path.suffix.lower()
+    if self.kind not in SOURCE_SUFFIXES:
+      raise ValueError(f"{path} isn't a .glyphs, .glyphspackage or .ufo source")
+    self.repo = pathlib.Path(git(path.parent, 'rev-parse', '--show-toplevel').strip())
+    self.relPath = path.relative_to(self.repo).as_posix()
+    self.revisions = []
+    self.readLog()
+
+  def fileSuffix(self, file):
+
+    '''
+    Suffix of one of the source's files, which decides how it's scanned, or
+    None if it doesn't define any codepoints (fontinfo, other layers, etc.)
+    '''
+
+    if self.kind == '.glyphs':
+      return '.glyphs' if file == self.relPath else None
+    folder, _, name = file.rpartition('/')
+    suffix = '.glif' if self.kind == '.ufo' else '.glyph'
+    if folder == f"{self.relPath}/glyphs" and name.endswith(suffix):
+      return suffix
+    return None
+
+  def readLog(self):
+    log = git(
+      self.repo, '-c', 'core.quotePath=false',
+      'log', '--reverse', '--first-parent', '-m', '--raw', '--no-abbrev', '--no-renames',
+      '--format=commit %H %ct', 'HEAD', '--', self.relPath,
+    )
+    for line in log.splitlines():
+      if line.startswith('commit '):
+        _, commit, timestamp = line.split()
+        changes = {}
+        self.revisions.append((commit, int(timestamp), changes))
+      elif line.startswith(':'):
+        # ":<old mode> <new mode> <old hash> <new hash> <status>\t<file>"
+        meta, file = line.split('\t', 1)
+        blob = meta.split()[3]
+        if self.fileSuffix(file):
+          changes[file] = None if not blob.strip('0') else blob
+
+  def codepointsByBlob(self, jobs=None):
+
+    '''
+    Codepoints in every blob of the history, by (hash, suffix). Blobs that
+    aren't in the cache are scanned by up to jobs worker processes.
+    '''
+
+    cache = readCache()
+    todo = sorted({
+      (blob, self.fileSuffix(file))
+      for _, _, changes in self.revisions
+      for file, blob in changes.items()
+      if blob
+    } - set(cache))
+
+    jobs = jobs or os.cpu_count() or 1
+    if todo:
+      size = math.ceil(len(todo) / (jobs * CHUNKS_PER_JOB))
+      chunks = [(self.repo, todo[i:i + size]) for i in range(0, len(todo), size)]
+      for result in utils.mapInProcesses_(codepointsFromBlobs_, chunks, jobs):
+        cache.update(result)
+      writeCache(cache)
+    self.numScanned = len(todo)
+    return cache
+
+  def coverage(self, data, scriptIds=None, jobs=None):
+
+    '''
+    Yield (commit, timestamp, added, removed, byScript) for each revision,
+    where added and removed are the codepoints that changed, and byScript
+    maps each script id to (complete, total) langs
+    '''
+
+    codepoints = self.codepointsByBlob(jobs)
+    if scriptIds is not None:
+      scriptIds = set(scriptIds)
+
+    blobs = {}
+    current = Counter()
+    complete = {}
+    numComplete = Counter()
+    numLangs = Counter()
+
+    for commit, timestamp, changes in self.revisions:
+      # Whether each codepoint touched by this commit was in the font before
+      touched = {}
+      for file, blob in changes.items():
+        suffix = self.fileSuffix(file)
+        old = blobs.pop(file, None)
+        if old:
+          for code in codepoints[(old, suffix)]:
+            touched.setdefault(code, True)
+            if current[code] <= 1:
+              del current[code]
+            else:
+              current[code] -= 1
+        if blob:
+          blobs[file] = blob
+          for code in codepoints[(blob, suffix)]:
+            touched.setdefault(code, code in current)
+            current[code] += 1
+      added = {c for c, was in touched.items() if not was and c in current}
+      removed = {c for c, was in touched.items() if was and c not in current}
+
+      if complete:
+        langIds = data.langIdsUsingChars(chr(c) for c in added | removed)
+        if scriptIds is not None:
+          langIds = {i for i in langIds if data.langRecords[i]['scriptId'] in scriptIds}
+      else:
+        langIds = None
+      if langIds is None or langIds:
+        for r in data.coverageRecords(scriptIds=scriptIds, codepoints=current, langIds=langIds):
+          was = complete.get(r['id'])
+          if was is None:
+            numLangs[r['scriptId']] += 1
+          elif was:
+            numComplete[r['scriptId']] -= 1
+          if r['complete']:
+            numComplete[r['scriptId']] += 1
+          complete[r['id']] = r['complete']
+
+      byScript = {s: (numComplete[s], numLangs[s]) for s in numLangs}
+      yield commit, timestamp, added, removed, byScript
+
+
+def cachePath():
+  return utils.cacheDir() / 'history' / 'codepoints.pickle'
+
+
+def readCache():
+  try:
+    with open(cachePath(), 'rb') as f:
+      cached = pickle.load(f)
+  except (OSError, pickle.UnpicklingError, EOFError):
+    return {}
+  if cached.get('format') != CACHE_FORMAT:
+    return {}
+  return cached['codepoints']
+
+
+def writeCache(codepoints):
+  path = cachePath()
+  try:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix('.tmp'), 'wb') as f:
+      pickle.dump(dict(format=CACHE_FORMAT, codepoints=codepoints), f, protocol=pickle.HIGHEST_PROTOCOL)
+    path.with_suffix('.tmp').replace(path)
+  except OSError:
+    # Not critical, blobs will just be scanned again next time
+    pass
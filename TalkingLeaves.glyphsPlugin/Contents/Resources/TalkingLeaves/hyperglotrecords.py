@@ -0,0 +1,66 @@
+'''
+Lang records built from Hyperglot's data, for DataSourceHyperglot. This is
+what takes the time when there's no cache, so it's split into chunks of
+languages that can be built in worker processes. It only imports hyperglot,
+so that workers start quickly.
+'''
+
+_scriptNames = None
+
+
+def scriptNameToIso(name):
+  global _scriptNames
+  if _scriptNames is None:
+    from hyperglot.loader import load_scripts_data
+    _scriptNames = load_scripts_data()
+  if name not in _scriptNames:
+    return name
+  return _scriptNames[name]['iso_15924']
+
+
+def recordsForIsos_(isos):
+
+  '''
+  Records of the orthographies of each language in isos, in order, as
+  (record, script name, speakers) tuples. speakers is the language's number
+  of speakers, or 0 if unknown, for adding up speakers of each script.
+  '''
+
+  import hyperglot.language
+  import hyperglot.orthography
+
+  records = []
+  for iso in isos:
+    lang = hyperglot.language.Language(iso)
+    for i, orthoData in enumerate(lang.get('orthographies', [])):
+      ortho = hyperglot.orthography.Orthography(orthoData)
+
+      scriptId = scriptNameToIso(ortho.script)
+
+      langId = f"{iso}_{i}_{scriptId}"
+
+      # Hyperglot's Language class uses dict for raw data
+      # and attributes for cleaned data.
+
+      # We need raw data in some cases, i.e. to distinguish between 0 and
+      # None for speakers, so the user can see whether speakers is explicitly
+      # zero, or there's no data. Similarly, status defaults to 'living'
+      # if undefined, but we will take a slightly different approach by
+      # assuming 'living' only if speakers is > 0.
+
+      speakers = -1 if lang['speakers'] is None else lang.speakers
+      record = dict(
+        id=langId,
+        iso=iso,
+        name=lang.get_name(),
+        scriptId=scriptId,
+        lang_status='' if lang['status'] is None and speakers <= 0 else lang.status,
+        ortho_status='' if ortho['status'] is None else ortho.status,
+        speakers=speakers,
+        chars=sorted(set(ortho.base_chars)) + sorted(set(ortho.base_marks)),
+        # Base + mark sequences without a precomposed codepoint, for
+        # checking that the marks attach (see shaping.py)
+        combinations=sorted({c for c in ortho.base if len(c) > 1}),
+      )
+      records.append((record, ortho.script, lang.get('speakers', 0) or 0))
+  return records
@@ -0,0 +1,180 @@
+'''
+Read the glyph names and codepoints of font sources (.glyphs,
+.glyphspackage, .ufo) without parsing the rest of the file: no outlines,
+no layers, no glyphsLib.
+
+.glyphs files are scanned for the glyphname/unicode lines with a regular
+expression. Packages and UFOs have a file per glyph, and only the glyph
+files that changed since the last refresh are read again, once they've
+stopped changing, so that a file isn't read halfway through being saved.
+'''
+
+import os, pathlib, plistlib, re, time
+from collections import Counter
+
+SOURCE_SUFFIXES = ('.glyphs', '.glyphspackage', '.ufo')
+
+# Glyphs doesn't indent its files, so glyph-level keys start at the
+# beginning of a line. Multiple codepoints are a list in parentheses.
+GLYPHS_ENTRY = re.compile(r'^(glyphname|unicode) = (\([^)]*\)|[^;]*);', re.MULTILINE)
+GLYPHS_FORMAT = re.compile(r'^\.formatVersion = (\d+);', re.MULTILINE)
+GLIF_UNICODE = re.compile(r'<unicode\s+hex\s*=\s*["\']([0-9A-Fa-f]+)["\']')
+
+# A changed file is read once it hasn't been modified for this long (in
+# nanoseconds), or its mtime and size are the same on two refreshes in a row
+SETTLE_NS = 1_000_000_000
+
+
+def glyphsInventoryFromText(text, formatVersion=None):
+
+  '''
+  Map glyph names to lists of codepoints. Glyphs 3 writes codepoints as
+  decimal numbers, Glyphs 2 as hex strings.
+  '''
+
+  if formatVersion is None:
+    match = GLYPHS_FORMAT.search(text)
+    formatVersion = int(match[1]) if match else 2
+  base = 10 if formatVersion >= 3 else 16
+
+  inventory = {}
+  name = None
+  for key, value in GLYPHS_ENTRY.findall(text):
+    value = value.strip().strip('"')
+    if key == 'glyphname':
+      name = value
+      inventory[name] = []
+    elif name is not None:
+      codes = re.split(r'[\s,()"]+', value)
+      inventory[name] = [int(c, base) for c in codes if c]
+  return inventory
+
+
+def glifCodepointsFromText(text):
+  return [int(h, 16) for h in GLIF_UNICODE.findall(text)]
+
+
+def glifCodepoints(path):
+  with open(path, encoding='utf-8') as f:
+    return glifCodepointsFromText(f.read())
+
+
+class SourceInventory:
+
+  '''
+  Glyph names and codepoints of a font source, kept up to date by
+  refresh(). codepoints is a multiset, because more than one glyph can
+  have the same codepoint.
+  '''
+
+  def __init__(self, path):
+    self.path = pathlib.Path(path)
+    suffix = self.path.suffix.lower()
+    if suffix not in SOURCE_SUFFIXES:
+      raise ValueError(f"{self.path} isn't a .glyphs, .glyphspackage or .ufo source")
+    self.kind = suffix
+    self.files = {}
+    self.codepoints = Counter()
+    self.glyphs = {}
+    self._formatVersion = None
+    self._ufoNames = {}
+    self._ufoContentsStat = None
+    self._touched = {}
+    # mtime and size of changed files that are waiting to settle
+    self._pending = {}
+
+  def refresh(self):
+
+    '''
+    Re-read changed files. Returns (added, removed) codepoint sets, which are
+    empty if nothing changed.
+    '''
+
+    # Whether each codepoint touched by this refresh was in the font before
+    self._touched = {}
+    if self.kind == '.glyphs':
+      self._refreshFiles({self.path: None})
+    elif self.kind == '.glyphspackage':
+      fontinfo = self.path / 'fontinfo.plist'
+      if self._formatVersion is None and fontinfo.exists():
+        match = GLYPHS_FORMAT.search(fontinfo.read_text(encoding='utf-8'))
+        self._formatVersion = int(match[1]) if match else 3
+      self._refreshFiles({p: None for p in (self.path / 'glyphs').glob('*.glyph')})
+    else:
+      self._refreshFiles(self._ufoGlifs())
+    added = {c for c, was in self._touched.items() if not was and c in self.codepoints}
+    removed = {c for c, was in self._touched.items() if was and c not in self.codepoints}
+    return added, removed
+
+  def _ufoGlifs(self):
+    contents = self.path / 'glyphs' / 'contents.plist'
+    stat = contents.stat()
+    if (stat.st_mtime_ns, stat.st_size) != self._ufoContentsStat:
+      with open(contents, 'rb') as f:
+        self._ufoNames = {
+          self.path / 'glyphs' / fileName: name
+          for name, fileName in plistlib.load(f).items()
+        }
+      self._ufoContentsStat = (stat.st_mtime_ns, stat.st_size)
+    return self._ufoNames
+
+  def _refreshFiles(self, paths):
+
+    '''
+    paths maps each file to its glyph name (UFO), or None if the names are
+    inside the file. Files whose mtime and size haven't changed are skipped,
+    and so are files that were read before and are still being written to
+    (see SETTLE_NS). Those are read on a later refresh.
+    '''
+
+    for path in set(self.files) - set(paths):
+      self._forget(path)
+      self._pending.pop(path, None)
+
+    for path, glyphName in paths.items():
+      try:
+        stat = os.stat(path)
+      except FileNotFoundError:
+        self._forget(path)
+        continue
+      key = (stat.st_mtime_ns, stat.st_size)
+      if path in self.files and self.files[path][0] == key:
+        continue
+      settled = time.time_ns() - stat.st_mtime_ns >= SETTLE_NS or self._pending.get(path) == key
+      if path in self.files and not settled:
+        self._pending[path] = key
+        continue
+      self._pending.pop(path, None)
+      try:
+        if glyphName is None:
+          text = pathlib.Path(path).read_text(encoding='utf-8')
+          glyphs = glyphsInventoryFromText(text, self._formatVersion)
+        else:
+          glyphs = {glyphName: glifCodepoints(path)}
+      except (OSError, ValueError):
+        # Probably caught in the middle of being saved, try again next time
+        continue
+      self._forget(path)
+      self.files[path] = (key, glyphs)
+      for name, codes in glyphs.items():
+        self.glyphs[name] = codes
+        self._touch(codes)
+        self.codepoints.update(codes)
+
+  def _forget(self, path):
+    if path not in self.files:
+      return
+    _, glyphs = self.files.pop(path)
+    for name, codes in glyphs.items():
+      self.glyphs.pop(name, None)
+      self._touch(codes)
+      for code in codes:
+        if self.codepoints[code] <= 1:
+          del self.codepoints[code]
+        else:
+          self.codepoints[code] -= 1
+
+  def _touch(self, codes):
+    for code in codes:
+      if code not in self._touched:
+        self._touched[code] = code in self.codepoints
@@ -0,0 +1,69 @@
+import bisect
+from collections import Counter
+
+
+class CoverageMatrix:
+
+  '''
+  Languages × characters of one script, stored sparsely.
+
+  Columns are the chars used by any of the languages, the most widely
+  needed first. Each row only stores the (sorted) column indexes of the
+  chars its language needs, and whether a char is missing from the font is
+  stored once per column, so a cell is one of: not needed, needed and
+  present, needed and missing.
+  '''
+
+  NOT_NEEDED, PRESENT, MISSING = 0, 1, 2
+
+  def __init__(self, langs, missing):
+
+    '''
+    langs is a list of lang records, missing maps each of their chars to
+    True if it's missing from the font (see Data.missingFromFont)
+    '''
+
+    counts = Counter(c for lang in langs for c in lang['chars'])
+    self.chars = sorted(counts, key=lambda c: (-counts[c], c))
+    self.needCounts = [counts[c] for c in self.chars]
+    self.missingCols = [missing[c] for c in self.chars]
+    column = {c: i for i, c in enumerate(self.chars)}
+
+    rows = []
+    for lang in langs:
+      cols = sorted(column[c] for c in lang['chars'])
+      numMissing = sum(self.missingCols[i] for i in cols)
+      rows.append((numMissing, lang['name'], lang['id'], tuple(cols)))
+    # Most complete languages first, like the languages table
+    rows.sort()
+    self.langIds = [r[2] for r in rows]
+    self.langNames = [r[1] for r in rows]
+    self.numMissing = [r[0] for r in rows]
+    self.rowCols = [r[3] for r in rows]
+
+  @property
+  def numRows(self):
+    return len(self.langIds)
+
+  @property
+  def numCols(self):
+    return len(self.chars)
+
+  def cell(self, row, col):
+    cols = self.rowCols[row]
+    i = bisect.bisect_left(cols, col)
+    if i == len(cols) or cols[i] != col:
+      return self.NOT_NEEDED
+    return self.MISSING if self.missingCols[col] else self.PRESENT
+
+  def neededColsInRange(self, row, firstCol, lastCol):
+
+    '''
+    Column indexes from firstCol to lastCol (inclusive) that row's language
+    needs, for drawing only the visible part of a row
+    '''
+
+    cols = self.rowCols[row]
+    start = bisect.bisect_left(cols, firstCol)
+    end = bisect.bisect_right(cols, lastCol)
+    return cols[start:end]
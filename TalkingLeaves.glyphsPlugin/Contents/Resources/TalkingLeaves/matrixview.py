@@ -0,0 +1,216 @@
+import objc
+import unicodedata
+from AppKit import (
+  NSView, NSRulerView, NSHorizontalRuler, NSVerticalRuler, NSColor, NSFont,
+  NSString, NSRectFill, NSTrackingArea,
+  NSTrackingMouseMoved, NSTrackingActiveInKeyWindow, NSTrackingInVisibleRect,
+  NSFontAttributeName, NSForegroundColorAttributeName,
+)
+from vanilla import Window, ScrollView, TextBox
+import TalkingLeaves.utils as utils
+
+CELL_SIZE = 18
+LABEL_WIDTH = 180
+HEADER_HEIGHT = 26
+
+
+# Objective-C classes can't be redefined, e.g. when the plugin is reloaded,
+# so the ones already registered are reused
+try:
+  CoverageMatrixView = objc.lookUpClass('CoverageMatrixView')
+except objc.nosuchclass_error:
+
+  class CoverageMatrixView(NSView):
+
+    '''
+    Draws the cells of a CoverageMatrix: a row for each language, a column
+    for each char, and a cell for each char a language needs (green if the
+    font has it, red if it's missing). Only the rows and columns inside the
+    rect being drawn are visited, and within a row only the needed columns,
+    so drawing cost depends on the visible area, not the size of the matrix.
+    The language names and chars are drawn by CoverageMatrixRulerView.
+    '''
+
+    def initWithFrame_(self, frame):
+      self = objc.super(CoverageMatrixView, self).initWithFrame_(frame)
+      if self is None:
+        return None
+      self.matrix = None
+      self.hoverCallback = None
+      area = NSTrackingArea.alloc().initWithRect_options_owner_userInfo_(
+        ((0, 0), (0, 0)),
+        NSTrackingMouseMoved | NSTrackingActiveInKeyWindow | NSTrackingInVisibleRect,
+        self,
+        None,
+      )
+      self.addTrackingArea_(area)
+      return self
+
+    def isFlipped(self):
+      return True
+
+    def isOpaque(self):
+      return True
+
+    @objc.python_method
+    def setMatrix(self, matrix):
+      self.matrix = matrix
+      self.setFrameSize_((matrix.numCols * CELL_SIZE, matrix.numRows * CELL_SIZE))
+      self.setNeedsDisplay_(True)
+
+    @objc.python_method
+    def cellAtPoint(self, point):
+      col = int(point.x // CELL_SIZE)
+      row = int(point.y // CELL_SIZE)
+      if 0 <= row < self.matrix.numRows and 0 <= col < self.matrix.numCols:
+        return row, col
+      return None, None
+
+    def drawRect_(self, rect):
+      NSColor.textBackgroundColor().set()
+      NSRectFill(rect)
+      m = self.matrix
+      if m is None or not m.numRows or not m.numCols:
+        return
+
+      (x, y), (w, h) = rect
+      firstRow = max(0, int(y // CELL_SIZE))
+      lastRow = min(m.numRows - 1, int((y + h) // CELL_SIZE))
+      firstCol = max(0, int(x // CELL_SIZE))
+      lastCol = min(m.numCols - 1, int((x + w) // CELL_SIZE))
+
+      # Set each colour once, then fill all of its cells
+      presentColor = utils.getSystemColorByName_('systemGreenColor')
+      missingColor = utils.getSystemColorByName_('systemRedColor')
+      present, missing = [], []
+      for row in range(firstRow, lastRow + 1):
+        top = row * CELL_SIZE + 1
+        for col in m.neededColsInRange(row, firstCol, lastCol):
+          cellRect = ((col * CELL_SIZE + 1, top), (CELL_SIZE - 2, CELL_SIZE - 2))
+          (missing if m.missingCols[col] else present).append(cellRect)
+      for color, cellRects in ((presentColor, present), (missingColor, missing)):
+        color.set()
+        for cellRect in cellRects:
+          NSRectFill(cellRect)
+
+    def mouseMoved_(self, event):
+      if self.matrix is None or self.hoverCallback is None:
+        return
+      point = self.convertPoint_fromView_(event.locationInWindow(), None)
+      row, col = self.cellAtPoint(point)
+      self.hoverCallback(row, col)
+
+
+try:
+  CoverageMatrixRulerView = objc.lookUpClass('CoverageMatrixRulerView')
+except objc.nosuchclass_error:
+
+  class CoverageMatrixRulerView(NSRulerView):
+
+    '''
+    The chars of a CoverageMatrixView along the top, as its horizontal
+    ruler, or its language names down the left, as its vertical ruler. The
+    scroll view keeps rulers in line with its document view, so these stay
+    in sight while the matrix scrolls.
+    '''
+
+    @objc.python_method
+    def rectFromTop(self, x, top, width, height):
+      # Rulers are only flipped when their client view is
+      if not self.isFlipped():
+        top = self.bounds().size.height - top - height
+      return ((x, top), (width, height))
+
+    def drawHashMarksAndLabelsInRect_(self, rect):
+      NSColor.windowBackgroundColor().set()
+      NSRectFill(rect)
+      view = self.clientView()
+      m = view.matrix if view is not None else None
+      if m is None or not m.numRows or not m.numCols:
+        return
+
+      textAttrs = {
+        NSFontAttributeName: NSFont.systemFontOfSize_(11),
+        NSForegroundColorAttributeName: NSColor.textColor(),
+      }
+      # The part of the matrix that's next to rect
+      (x, y), (w, h) = view.convertRect_fromView_(rect, self)
+
+      if self.orientation() == NSHorizontalRuler:
+        firstCol = max(0, int(x // CELL_SIZE))
+        lastCol = min(m.numCols - 1, int((x + w) // CELL_SIZE))
+        for col in range(firstCol, lastCol + 1):
+          char = m.chars[col]
+          if unicodedata.combining(char):
+            char = '◌' + char
+          (left, _), _ = self.convertRect_fromView_(((col * CELL_SIZE, 0), (CELL_SIZE, CELL_SIZE)), view)
+          NSString.stringWithString_(char).drawInRect_withAttributes_(
+            self.rectFromTop(left + 3, 6, CELL_SIZE + 6, HEADER_HEIGHT - 6), textAttrs
+          )
+      else:
+        firstRow = max(0, int(y // CELL_SIZE))
+        lastRow = min(m.numRows - 1, int((y + h) // CELL_SIZE))
+        for row in range(firstRow, lastRow + 1):
+          (_, top), _ = self.convertRect_fromView_(((0, row * CELL_SIZE), (CELL_SIZE, CELL_SIZE)), view)
+          NSString.stringWithString_(m.langNames[row]).drawInRect_withAttributes_(
+            ((4, top + 1), (LABEL_WIDTH - 8, CELL_SIZE - 2)), textAttrs
+          )
+
+
+class CoverageMatrixWindow:
+
+  '''
+  Window with a scrollable CoverageMatrixView, and a line of text that
+  describes the cell under the mouse
+  '''
+
+  def __init__(self, matrix, title):
+    self.matrix = matrix
+    self.w = Window((900, 600), title, minSize=(300, 200))
+    self.view = CoverageMatrixView.alloc().initWithFrame_(((0, 0), (100, 100)))
+    self.view.setMatrix(matrix)
+    self.view.hoverCallback = self.hoverCallback
+    self.w.scroll = ScrollView(
+      (0, 0, -0, -30),
+      self.view,
+      hasHorizontalScroller=True,
+      hasVerticalScroller=True,
+      autohidesScrollers=False,
+    )
+    scrollView = self.w.scroll.getNSScrollView()
+    for orientation, thickness in ((NSHorizontalRuler, HEADER_HEIGHT), (NSVerticalRuler, LABEL_WIDTH)):
+      ruler = CoverageMatrixRulerView.alloc().initWithScrollView_orientation_(scrollView, orientation)
+      ruler.setClientView_(self.view)
+      ruler.setRuleThickness_(thickness)
+      ruler.setReservedThicknessForMarkers_(0)
+      ruler.setReservedThicknessForAccessoryView_(0)
+      if orientation == NSHorizontalRuler:
+        scrollView.setHorizontalRulerView_(ruler)
+      else:
+        scrollView.setVerticalRulerView_(ruler)
+    scrollView.setHasHorizontalRuler_(True)
+    scrollView.setHasVerticalRuler_(True)
+    scrollView.setRulersVisible_(True)
+    self.w.info = TextBox(
+      (12, -24, -12, 17),
+      f"{matrix.numRows} languages × {matrix.numCols} characters",
+      sizeStyle="small",
+      selectable=True,
+    )
+    self.w.open()
+
+  def hoverCallback(self, row, col):
+    m = self.matrix
+    if row is None:
+      return
+    char = m.chars[col]
+    state = {
+      m.NOT_NEEDED: "not needed",
+      m.PRESENT: "in font",
+      m.MISSING: "missing",
+    }[m.cell(row, col)]
+    self.w.info.set(
+      f"{m.langNames[row]} ({m.numMissing[row]} missing) · "
+      f"{'◌' + char if unicodedata.combining(char) else char} U+{ord(char):04X} "
+      f"{unicodedata.name(char, '')}: {state}, needed by {m.needCounts[col]} languages"
+    )
@@ -0,0 +1,103 @@
+import unicodedata
+
+
+class GlyphPlan:
+
+  '''
+  What adding a set of chars to a font will do. Glyphs are listed by name:
+
+  order       all new glyphs, components before the composites that use them
+  composites  new glyphs that can be built from components
+  toDraw      new glyphs that have to be drawn
+  missingComponents
+              for new glyphs that have a recipe but can't be built, the
+              components that are neither in the font nor being added
+  chars       the char of each new glyph
+  '''
+
+  def __init__(self):
+    self.order = []
+    self.composites = []
+    self.toDraw = []
+    self.missingComponents = {}
+    self.chars = {}
+
+
+class RecipeGraph:
+
+  '''
+  Component recipes of glyphs, from GlyphData (the glyph info's components)
+  or else the char's canonical Unicode decomposition. Recipes are looked up
+  once per char and kept, so planning is just a walk over the cached graph.
+  '''
+
+  def __init__(self, data, font):
+    self.data = data
+    self.font = font
+    self.names = {}
+    self.recipes = {}
+
+  def recipeForChar(self, char):
+
+    '''
+    Return the glyph name for char, and the names of its components (an
+    empty list if it isn't a composite)
+    '''
+
+    if char not in self.names:
+      info = self.data.glyphInfoForChar(char, self.font)
+      components = [c.name for c in getattr(info, 'components', None) or []]
+      if not components:
+        decomposition = unicodedata.decomposition(char)
+        # Compatibility decompositions (<compat>, <super>, etc.) don't make
+        # good components
+        if decomposition and not decomposition.startswith('<'):
+          components = [
+            self.data.glyphNameForChar(chr(int(code, 16)), self.font)
+            for code in decomposition.split()
+          ]
+      self.names[char] = info.name
+      self.recipes[info.name] = components
+    return self.names[char], self.recipes[self.names[char]]
+
+  def plan(self, chars, existingNames):
+
+    '''
+    Plan adding chars to a font that already has glyphs named existingNames.
+    Chars whose glyphs already exist are skipped.
+    '''
+
+    plan = GlyphPlan()
+    for char in chars:
+      name, _ = self.recipeForChar(char)
+      if name not in existingNames and name not in plan.chars:
+        plan.chars[name] = char
+
+    for name in plan.chars:
+      components = self.recipes[name]
+      if not components:
+        plan.toDraw.append(name)
+        continue
+      missing = [c for c in components if c not in existingNames and c not in plan.chars]
+      if missing:
+        plan.toDraw.append(name)
+        plan.missingComponents[name] = missing
+      else:
+        plan.composites.append(name)
+
+    # Depth-first, so that new components are added before their composites
+    visited = set()
+
+    def visit(name):
+      if name in visited:
+        return
+      visited.add(name)
+      for component in self.recipes.get(name, []):
+        if component in plan.chars:
+          visit(component)
+      plan.order.append(name)
+
+    for name in plan.chars:
+      visit(name)
+
+    return plan
@@ -0,0 +1,88 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds to wait for more events before refreshing, e.g. while arrowing
+# through the scripts list
+DEBOUNCE_DELAY = 0.08
+
+
+def callLaterWithTimer(delay, function, *args):
+  timer = threading.Timer(delay, function, args)
+  timer.daemon = True
+  timer.start()
+
+
+def callNow(function, *args):
+  function(*args)
+
+
+class RefreshScheduler:
+
+  '''
+  Coalesces bursts of refresh requests into one refresh of the latest state,
+  computed on a background thread.
+
+  Each request bumps a generation number. After a short delay, if no newer
+  request came in, snapshot() captures the state on the main thread, and
+  compute(state) runs on a worker thread. Its result is handed to
+  deliver(result) on the main thread, unless a newer request came in
+  meanwhile. Stale requests are dropped before they start, and stale
+  results are thrown away, so only the latest state is ever delivered.
+
+  callLater(delay, function, *args) and callAfter(function, *args) must run
+  function on the main thread, e.g. PyObjCTools.AppHelper.callLater and
+  callAfter. The defaults use a timer thread and call directly, for running
+  without an event loop.
+  '''
+
+  def __init__(self, snapshot, compute, deliver, delay=DEBOUNCE_DELAY, callLater=None, callAfter=None):
+    self.snapshot = snapshot
+    self.compute = compute
+    self.deliver = deliver
+    self.delay = delay
+    self.callLater = callLater or callLaterWithTimer
+    self.callAfter = callAfter or callNow
+    self.generation = 0
+    # One worker, because computations share the data model
+    self.worker = ThreadPoolExecutor(1, thread_name_prefix='TalkingLeavesRefresh')
+
+  def request(self, delay=None):
+    self.generation += 1
+    self.callLater(self.delay if delay is None else delay, self._start, self.generation)
+
+  def cancel(self):
+
+    '''
+    Forget pending requests, and discard any result being computed
+    '''
+
+    self.generation += 1
+
+  def shutdown(self):
+    self.cancel()
+    self.worker.shutdown(wait=False)
+
+  def _start(self, generation):
+    # Main thread
+    if generation != self.generation:
+      return
+    state = self.snapshot()
+    self.worker.submit(self._compute, generation, state)
+
+  def _compute(self, generation, state):
+    # Worker thread
+    if generation != self.generation:
+      return
+    try:
+      result = self.compute(state)
+    except Exception:
+      traceback.print_exc()
+      return
+    if generation == self.generation:
+      self.callAfter(self._deliver, generation, result)
+
+  def _deliver(self, generation, result):
+    # Main thread
+    if generation == self.generation:
+      self.deliver(result)
@@ -0,0 +1,139 @@
+import bisect
+import re
+from collections import defaultdict
+
+
+class SearchIndex:
+
+  '''
+  Prebuilt index for incremental searching of orthographies by language name,
+  ISO code, script or character, across all scripts.
+
+  Words are kept in a sorted list for prefix lookups, and every searchable
+  string is broken into trigrams for substring lookups. Characters map
+  directly to the orthographies that use them. Queries only touch the index
+  (and the previous query's results, when the user is still typing), never
+  the DataFrames. Since searching updates the previous query's results, an
+  index is only searched from one thread.
+  '''
+
+  def __init__(self, records, scriptNames=None):
+    scriptNames = scriptNames or {}
+    self.ids = []
+    self.speakers = {}
+    self.haystacks = {}
+    self.wordsById = {}
+    self.charIndex = defaultdict(set)
+    self.trigramIndex = defaultdict(set)
+    wordIndex = defaultdict(set)
+
+    for record in records:
+      langId = record['id']
+      self.ids.append(langId)
+      self.speakers[langId] = record['speakers']
+      fields = [
+        record['name'],
+        record['iso'],
+        record['scriptId'],
+        scriptNames.get(record['scriptId'], ''),
+      ]
+      haystack = ' '.join(fields).lower()
+      self.haystacks[langId] = haystack
+
+      self.wordsById[langId] = self.wordsFromText_(haystack)
+      for word in self.wordsById[langId]:
+        wordIndex[word].add(langId)
+      for trigram in self.trigrams(haystack):
+        self.trigramIndex[trigram].add(langId)
+      for char in record['chars']:
+        self.charIndex[char].add(langId)
+
+    self.words = sorted(wordIndex)
+    self.wordIndex = dict(wordIndex)
+
+    # Results of the last query, so that typing another letter only has to
+    # narrow down the previous results
+    self._lastQuery = None
+    self._lastResults = None
+
+  def __len__(self):
+    return len(self.ids)
+
+  def wordsFromText_(self, text):
+    return [w for w in re.split(r'\W+', text) if w]
+
+  def trigrams(self, text):
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+  def search(self, query):
+
+    '''
+    Return ids of orthographies matching every whitespace-separated term in
+    query, sorted by speakers (most first).
+    '''
+
+    terms = query.split()
+    if not terms:
+      return []
+
+    if self.isRefinementOf_(query):
+      # Still typing the same term: filter the previous results
+      ids = [i for i in self._lastResults if self.matchesTerm_id_(terms[-1], i)]
+    else:
+      matches = None
+      for term in terms:
+        termMatches = self.idsForTerm_(term)
+        matches = termMatches if matches is None else matches & termMatches
+        if not matches:
+          break
+      ids = sorted(matches, key=lambda i: (-self.speakers[i], i))
+
+    self._lastQuery = query
+    self._lastResults = ids
+    return ids
+
+  def isRefinementOf_(self, query):
+
+    '''
+    True if query only extends the last term of the previous query, in a way
+    that can only remove matches (word prefixes and substrings both shrink
+    as they get longer, but switching from one to the other doesn't).
+    '''
+
+    if not self._lastQuery or not query.startswith(self._lastQuery):
+      return False
+    terms, lastTerms = query.split(), self._lastQuery.split()
+    if terms[:-1] != lastTerms[:-1] or len(terms) != len(lastTerms):
+      return False
+    return len(lastTerms[-1]) >= 3 or len(terms[-1]) < 3
+
+  def idsForTerm_(self, term):
+    lowered = term.lower()
+    ids = set(self.charIndex.get(term, ()))
+
+    if len(lowered) >= 3:
+      # Substring match: intersect trigram postings, then verify
+      candidates = None
+      for trigram in self.trigrams(lowered):
+        posting = self.trigramIndex.get(trigram, set())
+        candidates = posting if candidates is None else candidates & posting
+        if not candidates:
+          break
+      ids.update(i for i in candidates or () if lowered in self.haystacks[i])
+    else:
+      # Too short for trigrams: match the beginnings of words instead
+      start = bisect.bisect_left(self.words, lowered)
+      for word in self.words[start:]:
+        if not word.startswith(lowered):
+          break
+        ids.update(self.wordIndex[word])
+
+    return ids
+
+  def matchesTerm_id_(self, term, langId):
+    lowered = term.lower()
+    if langId in self.charIndex.get(term, ()):
+      return True
+    if len(lowered) >= 3:
+      return lowered in self.haystacks[langId]
+    return any(word.startswith(lowered) for word in self.wordsById[langId])
@@ -0,0 +1,78 @@
+from collections import Counter
+
+
+class SelectionModel:
+
+  '''
+  Running totals for the selected rows of the languages table.
+
+  Missing chars of the selected rows are kept as a multiset (how many
+  selected rows miss each char), so changing the selection only has to add
+  or subtract the rows that were selected or deselected, and the totals can
+  be read without looking at the rows again.
+  '''
+
+  def __init__(self):
+    self.setRows([])
+
+  def setRows(self, rows):
+
+    '''
+    Replace the rows (as passed to List2.set) and clear the selection
+    '''
+
+    self.rows = rows
+    self.selected = set()
+    self.missing = Counter()
+    self.numWithMissing = 0
+
+  def updateRows(self, rows):
+
+    '''
+    Replace the rows, keeping the rows that are still there (by id) selected
+    '''
+
+    selectedIds = {self.rows[i]['id'] for i in self.selected}
+    self.setRows(rows)
+    self.select(i for i, row in enumerate(rows) if row['id'] in selectedIds)
+
+  def select(self, indexes):
+
+    '''
+    Update the totals to a new selection, given as row indexes
+    '''
+
+    indexes = set(indexes)
+    missing = self.missing
+    for i in self.selected - indexes:
+      chars = self.rows[i]['chars']
+      if chars:
+        self.numWithMissing -= 1
+        for char in chars:
+          # Drop chars no selected row is missing, so that len(missing) is
+          # the number of distinct missing chars
+          if missing[char] == 1:
+            del missing[char]
+          else:
+            missing[char] -= 1
+    for i in indexes - self.selected:
+      chars = self.rows[i]['chars']
+      if chars:
+        self.numWithMissing += 1
+        missing.update(chars)
+    self.selected = indexes
+
+  @property
+  def numSelected(self):
+    return len(self.selected)
+
+  @property
+  def numMissingChars(self):
+    return len(self.missing)
+
+  @property
+  def hasMissingChars(self):
+    return self.numWithMissing > 0
+
+  def selectedRows(self):
+    return [self.rows[i] for i in sorted(self.selected)]
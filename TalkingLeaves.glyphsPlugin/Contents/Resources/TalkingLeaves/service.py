@@ -0,0 +1,265 @@
+'''
+Local coverage service: keeps the language data loaded, and answers coverage
+queries over HTTP (on localhost or a Unix socket) with JSON, so that many
+short-lived clients (e.g. CI jobs) don't each pay for loading Hyperglot.
+
+  GET  /health    {"status": "ok", "langs": 889, ...}
+  POST /coverage  {"font": "/path/to/font.otf"}
+                  {"codepoints": [65, 66, ...]}
+
+Coverage requests can also have "scripts" (ISO 15924 codes) to only check
+some scripts, and "summary": true to leave out the records of each language.
+The response has complete/total langs, by script and overall, and unless
+it's a summary, a "langs" list of coverage records (see
+Data.coverageRecords).
+
+Fonts are read once per modification time, and responses are cached, so a
+build box full of jobs checking the same fonts mostly gets cached answers.
+'''
+
+import json, os, socketserver, struct, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from TalkingLeaves.cmap import codepointsFromFont, CmapError
+
+DEFAULT_PORT = 8766
+
+# Cached fonts and responses, least recently used are dropped first
+MAX_CACHED = 256
+
+
+class LRUCache:
+
+  def __init__(self, size=MAX_CACHED):
+    self.size = size
+    self.items = OrderedDict()
+    self.lock = threading.Lock()
+
+  def get(self, key):
+    with self.lock:
+      if key not in self.items:
+        return None
+      self.items.move_to_end(key)
+      return self.items[key]
+
+  def set(self, key, value):
+    with self.lock:
+      self.items[key] = value
+      self.items.move_to_end(key)
+      while len(self.items) > self.size:
+        self.items.popitem(last=False)
+
+
+class RequestError(ValueError):
+  pass
+
+
+class CoverageService:
+
+  '''
+  Answers coverage requests (parsed JSON) from a loaded Data. Safe to call
+  from several threads, because Data is only read.
+  '''
+
+  def __init__(self, data):
+    self.data = data
+    self.fonts = LRUCache()
+    self.responses = LRUCache()
+    self.numRequests = 0
+    self.lock = threading.Lock()
+
+  def health(self):
+    return dict(
+      status='ok',
+      langs=len(self.data.langRecords),
+      scripts=len(self.data.scripts),
+      sources=[ds.cacheName() for ds in self.data.sources],
+      requests=self.numRequests,
+    )
+
+  def codepointsForFont(self, path, fontNumber=0):
+    path = os.path.realpath(path)
+    try:
+      stat = os.stat(path)
+      key = (path, fontNumber, stat.st_mtime_ns, stat.st_size)
+      codepoints = self.fonts.get(key)
+      if codepoints is None:
+        codepoints = frozenset(codepointsFromFont(path, fontNumber))
+        self.fonts.set(key, codepoints)
+    except OSError as e:
+      raise RequestError(f"{path}: {e}")
+    except (CmapError, ValueError, struct.error) as e:
+      # Any font that can't be parsed is the client's error. CmapError names
+      # the path already.
+      raise RequestError(str(e) if isinstance(e, CmapError) else f"{path}: {e}")
+    return key, codepoints
+
+  def coverage(self, request):
+
+    '''
+    Coverage response for a request, as JSON-ready dict
+    '''
+
+    # Requests are handled by several threads
+    with self.lock:
+      self.numRequests += 1
+    if not isinstance(request, dict):
+      raise RequestError("Request must be a JSON object")
+    scripts = request.get('scripts')
+    if scripts is not None and not (isinstance(scripts, list) and all(isinstance(s, str) for s in scripts)):
+      raise RequestError("scripts must be a list of ISO 15924 codes")
+    summary = bool(request.get('summary', False))
+
+    if 'font' in request:
+      fontKey, codepoints = self.codepointsForFont(str(request['font']), int(request.get('fontNumber', 0)))
+    elif 'codepoints' in request:
+      try:
+        codepoints = frozenset(int(c) for c in request['codepoints'])
+      except (TypeError, ValueError):
+        raise RequestError("codepoints must be a list of integers")
+      fontKey = codepoints
+    else:
+      raise RequestError("Request needs a font path or a list of codepoints")
+
+    key = (fontKey, tuple(sorted(scripts)) if scripts else None, summary)
+    response = self.responses.get(key)
+    if response is None:
+      records = self.data.coverageRecords(scriptIds=scripts, codepoints=codepoints)
+      byScript = {}
+      for r in records:
+        complete, total = byScript.get(r['scriptId'], (0, 0))
+        byScript[r['scriptId']] = (complete + r['complete'], total + 1)
+      response = dict(
+        complete=sum(r['complete'] for r in records),
+        total=len(records),
+        byScript={s: dict(complete=c, total=t) for s, (c, t) in sorted(byScript.items())},
+      )
+      if not summary:
+        response['langs'] = records
+      self.responses.set(key, response)
+    if 'font' in request:
+      response = dict(response, font=fontKey[0])
+    return response
+
+
+class Handler(BaseHTTPRequestHandler):
+
+  protocol_version = 'HTTP/1.1'
+
+  # Idle keep-alive connections give their worker back after this long.
+  # Connections are also closed after a response whenever others are
+  # waiting for a worker (see PooledMixIn).
+  timeout = 5
+
+  def do_GET(self):
+    if self.path.rstrip('/') == '/health':
+      self.sendJson(200, self.server.service.health())
+    else:
+      self.sendJson(404, dict(error=f"Not found: {self.path}"))
+
+  def do_POST(self):
+    if self.path.rstrip('/') != '/coverage':
+      self.sendJson(404, dict(error=f"Not found: {self.path}"))
+      return
+    try:
+      length = int(self.headers.get('Content-Length', 0))
+      request = json.loads(self.rfile.read(length) or b'{}')
+      response = self.server.service.coverage(request)
+    except (ValueError, TypeError) as e:
+      self.sendJson(400, dict(error=str(e)))
+      return
+    except Exception as e:
+      # Answer rather than drop the connection, and log it like any error
+      self.server.handle_error(self.request, self.client_address)
+      self.sendJson(500, dict(error=f"Internal error: {e}"))
+      return
+    self.sendJson(200, response)
+
+  def sendJson(self, status, body):
+    content = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json; charset=utf-8')
+    self.send_header('Content-Length', str(len(content)))
+    if self.server.hasWaitingConnections():
+      self.close_connection = True
+      self.send_header('Connection', 'close')
+    self.end_headers()
+    self.wfile.write(content)
+
+  def address_string(self):
+    # Unix socket clients have no address
+    return self.client_address[0] if self.client_address else 'unix'
+
+  def log_message(self, format, *args):
+    if self.server.verbose:
+      super().log_message(format, *args)
+
+
+class PooledMixIn:
+
+  '''
+  Handle each connection in a thread from a fixed pool, rather than a new
+  thread per connection like ThreadingMixIn, so that a burst of clients
+  doesn't start hundreds of threads. A keep-alive connection holds its
+  worker while idle, so connections are closed after a response when
+  others are waiting for a worker.
+  '''
+
+  # Connections waiting for a worker, the default (5) is too few for a
+  # burst of clients
+  request_queue_size = 128
+
+  def startPool(self, workers):
+    self.pool = ThreadPoolExecutor(workers, thread_name_prefix='TalkingLeaves')
+    self.numWaiting = 0
+    self.waitingLock = threading.Lock()
+
+  def hasWaitingConnections(self):
+    return self.numWaiting > 0
+
+  def process_request(self, request, client_address):
+    with self.waitingLock:
+      self.numWaiting += 1
+    self.pool.submit(self.processRequestInPool, request, client_address)
+
+  def processRequestInPool(self, request, client_address):
+    with self.waitingLock:
+      self.numWaiting -= 1
+    try:
+      self.finish_request(request, client_address)
+    except Exception:
+      self.handle_error(request, client_address)
+    finally:
+      self.shutdown_request(request)
+
+  def server_close(self):
+    super().server_close()
+    self.pool.shutdown(wait=False)
+
+
+class PooledHTTPServer(PooledMixIn, HTTPServer):
+  pass
+
+
+class PooledUnixHTTPServer(PooledMixIn, socketserver.UnixStreamServer):
+  pass
+
+
+def makeServer(service, host='127.0.0.1', port=DEFAULT_PORT, socketPath=None, workers=8, verbose=False):
+
+  '''
+  HTTP server for a CoverageService, on a Unix socket if socketPath is
+  given, else on host and port
+  '''
+
+  if socketPath:
+    if os.path.exists(socketPath):
+      os.unlink(socketPath)
+    server = PooledUnixHTTPServer(str(socketPath), Handler)
+  else:
+    server = PooledHTTPServer((host, port), Handler)
+  server.startPool(workers)
+  server.service = service
+  server.verbose = verbose
+  return server
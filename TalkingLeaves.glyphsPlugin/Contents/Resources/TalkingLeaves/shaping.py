@@ -0,0 +1,301 @@
+'''
+Check how compiled fonts shape each language, with HarfBuzz (uharfbuzz,
+which is optional and only needed here). Having all of a language's
+codepoints doesn't mean it renders: marks may not attach, and joining
+scripts need contextual forms. For each lang this shapes:
+
+  - each of its chars, flagging those that come out as .notdef
+  - its base + mark sequences (chars that decompose, and Hyperglot's
+    unencoded combinations), flagging those whose marks the font doesn't
+    position, i.e. they end up in the same place with mark/mkmk turned off
+  - its joining chars (Arabic, Syriac, N'Ko...) next to zero width joiners,
+    flagging those that don't change form
+
+and lists the OpenType features those need that the font doesn't have.
+
+Langs with the same chars are only checked once. The rest are shaped in
+batches of one script, spread over worker processes, and the results are
+cached by the SHA-1 of the font file, so checking a family again only
+shapes the fonts that changed.
+'''
+
+import hashlib, pickle, unicodedata
+import TalkingLeaves.utils as utils
+
+# Bump this whenever the checks change, so that cached results are redone
+CACHE_FORMAT = 2
+
+# Most samples per batch. Batches never mix scripts, so that the strings
+# shaped by a worker are shared by similar langs, but big scripts (Latin has
+# ~600 langs) are split, to keep the workers busy.
+BATCH_SIZE = 50
+
+ZWJ = '\u200d'
+
+# Fields of the records of checkFont, in order
+SHAPING_FIELDS = (
+  'id', 'iso', 'name', 'scriptId', 'ok', 'notdef', 'unpositioned', 'unjoined',
+  'missing_features',
+)
+
+# Shaping with these turned off shows where marks would be left unpositioned
+WITHOUT_MARK_FEATURES = dict(mark=False, mkmk=False)
+
+# Features needed by chars of each joining type (see Unicode ArabicShaping.txt)
+JOINING_FEATURES = dict(D=('init', 'medi', 'fina'), R=('fina',), L=('init',))
+
+
+class ShapingError(ValueError):
+  pass
+
+
+def fontHash(path):
+  h = hashlib.sha1()
+  with open(path, 'rb') as f:
+    for chunk in iter(lambda: f.read(1 << 20), b''):
+      h.update(chunk)
+  return h.hexdigest()
+
+
+def isMark(char):
+  return unicodedata.category(char) == 'Mn'
+
+
+def sampleForLang(record):
+
+  '''
+  What to shape for a lang record: its chars, and its base + mark sequences,
+  decomposed. Also the key that its results are cached by.
+  '''
+
+  chars = tuple(record['chars'])
+  sequences = set()
+  for c in chars + tuple(record.get('combinations') or ()):
+    decomposed = unicodedata.normalize('NFD', c)
+    if len(decomposed) > 1 and any(isMark(m) for m in decomposed[1:]):
+      sequences.add(decomposed)
+  return chars, tuple(sorted(sequences))
+
+
+class FontShaper:
+
+  '''
+  Shapes strings with one font, and remembers the results, because langs of
+  the same script shape many of the same strings
+  '''
+
+  def __init__(self, path, fontNumber=0):
+    import uharfbuzz as hb
+    self.hb = hb
+    face = hb.Face(hb.Blob.from_file_path(str(path)), fontNumber)
+    self.font = hb.Font(face)
+    self.features = set()
+    for table in ('GSUB', 'GPOS'):
+      for i, _ in enumerate(face.get_table_script_tags(table)):
+        self.features.update(face.get_language_feature_tags(table, i))
+    self._shaped = {}
+
+  def shape(self, text, features=None):
+
+    '''
+    (glyph id, cluster, x offset, y offset) of each glyph. Marks are kept in
+    clusters of their own, and clusters are indexes into text.
+    '''
+
+    key = (text, tuple(sorted(features.items())) if features else None)
+    if key not in self._shaped:
+      hb = self.hb
+      buffer = hb.Buffer()
+      buffer.add_codepoints([ord(c) for c in text])
+      buffer.guess_segment_properties()
+      buffer.cluster_level = hb.BufferClusterLevel.MONOTONE_CHARACTERS
+      hb.shape(self.font, buffer, features or {})
+      self._shaped[key] = [
+        (info.codepoint, info.cluster, pos.x_offset, pos.y_offset)
+        for info, pos in zip(buffer.glyph_infos, buffer.glyph_positions)
+      ]
+    return self._shaped[key]
+
+  def hasNotdef(self, text):
+    return any(glyph == 0 for glyph, *_ in self.shape(text))
+
+  def isComposed(self, sequence):
+    # HarfBuzz composes a sequence if the font has the precomposed glyph,
+    # and the font's ccmp can too
+    return len(self.shape(sequence)) == 1
+
+  def marksArePositioned(self, sequence):
+    positioned = self.shape(sequence)
+    unpositioned = self.shape(sequence, WITHOUT_MARK_FEATURES)
+    for (_, cluster, x, y), (_, _, x0, y0) in zip(positioned, unpositioned):
+      if isMark(sequence[cluster]) and (x, y) == (x0, y0):
+        return False
+    return True
+
+  def joins(self, char, joiningType):
+
+    '''
+    Whether char takes another form when joined on each side it joins on.
+    HarfBuzz hides the joiners (and merges their clusters), so the isolated
+    glyph is looked for anywhere in the output.
+    '''
+
+    isolated = self.shape(char)[0][0]
+    contexts = []
+    if joiningType in 'DR':
+      contexts.append(ZWJ + char)
+    if joiningType in 'DL':
+      contexts.append(char + ZWJ)
+    if joiningType == 'D':
+      contexts.append(ZWJ + char + ZWJ)
+    for text in contexts:
+      if any(glyph == isolated for glyph, *_ in self.shape(text)):
+        return False
+    return True
+
+  def check(self, chars, sequences):
+
+    '''
+    Problems of one sample (see sampleForLang), as lists of chars, sequences
+    and feature tags
+    '''
+
+    from hyperglot.parse import get_joining_type
+
+    notdef = [c for c in chars if self.hasNotdef(c)]
+    needed = set()
+    unpositioned = []
+    for sequence in sequences:
+      if self.hasNotdef(sequence):
+        notdef.append(sequence)
+      elif not self.isComposed(sequence):
+        needed.add('mark')
+        if sum(isMark(m) for m in sequence) > 1:
+          needed.add('mkmk')
+        if not self.marksArePositioned(sequence):
+          unpositioned.append(sequence)
+
+    unjoined = []
+    for c in chars:
+      joiningType = get_joining_type(c)
+      if joiningType in JOINING_FEATURES and c not in notdef:
+        needed.update(JOINING_FEATURES[joiningType])
+        if not self.joins(c, joiningType):
+          unjoined.append(c)
+
+    # A precomposed char and its decomposed sequence are the same text, so
+    # only list it once, as it was first found
+    unique = {}
+    for text in notdef:
+      unique.setdefault(unicodedata.normalize('NFC', text), text)
+    notdef = list(unique.values())
+
+    return dict(
+      notdef=notdef,
+      unpositioned=unpositioned,
+      unjoined=unjoined,
+      missing_features=sorted(needed - self.features),
+    )
+
+
+# Shapers of the fonts this worker process has checked
+_shapers = {}
+
+
+def checkBatch_(batch):
+
+  '''
+  Check a batch of samples in a worker process, returning (key, problems)
+  pairs
+  '''
+
+  path, fontNumber, samples = batch
+  if (path, fontNumber) not in _shapers:
+    _shapers[(path, fontNumber)] = FontShaper(path, fontNumber)
+  shaper = _shapers[(path, fontNumber)]
+  return [(key, shaper.check(*key)) for key in samples]
+
+
+def cachePath(fontKey):
+  digest, fontNumber = fontKey
+  return utils.cacheDir() / 'shaping' / f"{digest}-{fontNumber}.pickle"
+
+
+def readCache(fontKey, version):
+  try:
+    with open(cachePath(fontKey), 'rb') as f:
+      cached = pickle.load(f)
+  except (OSError, pickle.UnpicklingError, EOFError):
+    return {}
+  if cached.get('format') != (CACHE_FORMAT, version):
+    return {}
+  return cached['results']
+
+
+def writeCache(fontKey, version, results):
+  path = cachePath(fontKey)
+  try:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix('.tmp'), 'wb') as f:
+      pickle.dump(dict(format=(CACHE_FORMAT, version), results=results), f, protocol=pickle.HIGHEST_PROTOCOL)
+    path.with_suffix('.tmp').replace(path)
+  except OSError:
+    # Not critical, the font will just be shaped again next time
+    pass
+
+
+def checkFont(data, path, fontNumber=0, scriptIds=None, langIds=None, jobs=None):
+
+  '''
+  One record per orthography (of scriptIds and langIds, or all) with the
+  shaping problems of the compiled font at path. ok is True if there are
+  none.
+  '''
+
+  try:
+    import uharfbuzz
+  except ImportError:
+    raise ShapingError("shaping checks require uharfbuzz: pip3 install uharfbuzz")
+  try:
+    fontKey = (fontHash(path), fontNumber)
+  except OSError as e:
+    raise ShapingError(f"{path}: {e.strerror or e}")
+
+  langs = list(data.langRecords.values()) if langIds is None else [data.langRecords[i] for i in sorted(langIds)]
+  if scriptIds is not None:
+    scriptIds = set(scriptIds)
+    langs = [lang for lang in langs if lang['scriptId'] in scriptIds]
+  samples = {lang['id']: sampleForLang(lang) for lang in langs}
+
+  results = readCache(fontKey, uharfbuzz.__version__)
+  byScript = {}
+  for lang in langs:
+    key = samples[lang['id']]
+    if key not in results:
+      byScript.setdefault(lang['scriptId'], {})[key] = None
+  batches = []
+  for keys in byScript.values():
+    keys = list(keys)
+    for i in range(0, len(keys), BATCH_SIZE):
+      batches.append((str(path), fontNumber, keys[i:i + BATCH_SIZE]))
+  if batches:
+    try:
+      for batchResults in utils.mapInProcesses_(checkBatch_, batches, jobs):
+        results.update(batchResults)
+    except RuntimeError as e:
+      # HarfBuzz couldn't read the font
+      raise ShapingError(f"{path}: {e}")
+    writeCache(fontKey, uharfbuzz.__version__, results)
+
+  records = []
+  for lang in langs:
+    problems = results[samples[lang['id']]]
+    records.append(dict(
+      id=lang['id'],
+      iso=lang['iso'],
+      name=lang['name'],
+      scriptId=lang['scriptId'],
+      ok=not any(problems.values()),
+      **problems,
+    ))
+  return records
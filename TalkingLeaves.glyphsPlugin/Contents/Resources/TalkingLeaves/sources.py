@@ -0,0 +1,183 @@
+'''
+Character set sources besides Hyperglot.
+
+Put character set files in SOURCES_DIR, and they are listed alongside
+Hyperglot's scripts. Files directly in SOURCES_DIR are grouped under
+"Custom", files in a subfolder are grouped under the subfolder's name (for
+example Sources/GF Glyph Sets/GF_Latin_Core.nam). Supported formats:
+
+  .txt   One character set per file, named after the file. Characters are
+         separated by whitespace, and can be written as themselves or as
+         U+00E9 / 0x00E9. Lines starting with # are comments.
+  .json  Several character sets per file: {"Set name": "chars or list"} or
+         [{"name": "Set name", "chars": "chars or list"}, ...]
+  .nam   Google Fonts glyphset files (0x00E9 é LATIN SMALL LETTER E WITH ACUTE).
+         Unencoded glyphs are ignored.
+
+Other formats can be supported by subclassing DataSourceFile and calling
+registerSourceType().
+'''
+
+import hashlib, json, pathlib, re, unicodedata
+from TalkingLeaves.data import DataSource, DataSourceHyperglot
+
+SOURCES_DIR = pathlib.Path('~/Library/Application Support/TalkingLeaves/Sources').expanduser()
+DEFAULT_GROUP = 'Custom'
+
+SOURCE_TYPES = {}
+
+
+def registerSourceType(suffix, sourceClass):
+  SOURCE_TYPES[suffix.lower()] = sourceClass
+
+
+def defaultSources(sourcesDir=SOURCES_DIR):
+
+  '''
+  Hyperglot, plus a source for every supported file in sourcesDir
+  '''
+
+  sources = [DataSourceHyperglot()]
+  if sourcesDir.is_dir():
+    for path in sorted(sourcesDir.rglob('*')):
+      sourceClass = SOURCE_TYPES.get(path.suffix.lower())
+      if sourceClass and path.is_file() and not path.name.startswith('.'):
+        group = DEFAULT_GROUP if path.parent == sourcesDir else path.parent.name
+        try:
+          sources.append(sourceClass(path, group, sourcesDir))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+          print(f"TalkingLeaves: couldn't load {path}: {e}")
+  pruneCaches(sources)
+  return sources
+
+
+def pruneCaches(sources):
+
+  '''
+  Delete the cached records of sources that aren't in sources, e.g. of files
+  that were removed from the sources folder
+  '''
+
+  used = {source.cachePath().name for source in sources}
+  cacheDir = sources[0].cachePath().parent
+  if not cacheDir.is_dir():
+    return
+  for path in cacheDir.glob('*.pickle'):
+    if path.name not in used:
+      try:
+        path.unlink()
+      except OSError:
+        pass
+
+
+class DataSourceFile(DataSource):
+
+  '''
+  Base class for sources that read character sets from a local file.
+  Subclasses implement charSets(), returning a {name: chars} dict, where
+  chars is any iterable of single-char strings.
+
+  Lang ids are "custom:<file>:<name>", where file is the path relative to
+  sourcesDir, so they can't clash with Hyperglot's, or each other's.
+  '''
+
+  def __init__(self, path, group=DEFAULT_GROUP, sourcesDir=SOURCES_DIR):
+    self.path = pathlib.Path(path)
+    self.group = group
+    self.sourcesDir = pathlib.Path(sourcesDir)
+    super().__init__()
+
+  def fileId(self):
+    if self.path.is_relative_to(self.sourcesDir):
+      return self.path.relative_to(self.sourcesDir).as_posix()
+    return self.path.as_posix()
+
+  def cacheKey(self):
+    stat = self.path.stat()
+    return (str(self.path), self.fileId(), self.group, stat.st_mtime_ns, stat.st_size)
+
+  def cacheName(self):
+    pathHash = hashlib.sha1(str(self.path).encode('utf-8')).hexdigest()[:16]
+    return f"{type(self).__name__}-{pathHash}"
+
+  def load(self):
+    scriptId = f"custom:{self.group}"
+    self.scripts[scriptId] = dict(
+      id=scriptId,
+      name=self.group,
+      speakers=0,
+    )
+    for name, chars in self.charSets().items():
+      langId = f"custom:{self.fileId()}:{name}"
+      chars = set(chars)
+      bases = sorted(c for c in chars if not unicodedata.combining(c))
+      marks = sorted(c for c in chars if unicodedata.combining(c))
+      self.langs[langId] = dict(
+        id=langId,
+        iso='',
+        name=name,
+        scriptId=scriptId,
+        lang_status='',
+        ortho_status='',
+        speakers=-1,
+        chars=bases + marks,
+      )
+
+  def charsFromText(self, text):
+    chars = []
+    for line in text.splitlines():
+      line = line.strip()
+      if line.startswith('#'):
+        continue
+      for token in line.split():
+        chars.extend(self.charsFromToken(token))
+    return chars
+
+  def charsFromToken(self, token):
+    match = re.fullmatch(r'(?:U\+|0x)([0-9A-Fa-f]{4,6})', token)
+    if match:
+      return [chr(int(match[1], 16))]
+    # Marks may be written with a dotted circle
+    return [c for c in token if c != '◌']
+
+
+class DataSourceTextFile(DataSourceFile):
+
+  def charSets(self):
+    return {self.path.stem: self.charsFromText(self.path.read_text(encoding='utf-8'))}
+
+
+class DataSourceJsonFile(DataSourceFile):
+
+  def charSets(self):
+    data = json.loads(self.path.read_text(encoding='utf-8'))
+    if isinstance(data, dict):
+      items = data.items()
+    elif isinstance(data, list):
+      items = [(item['name'], item['chars']) for item in data]
+    else:
+      raise ValueError("expected an object or a list of character sets")
+
+    charSets = {}
+    for name, chars in items:
+      if isinstance(chars, str):
+        charSets[name] = self.charsFromText(chars)
+      else:
+        charSets[name] = [c for token in chars for c in self.charsFromToken(token)]
+    return charSets
+
+
+class DataSourceNamFile(DataSourceFile):
+
+  def charSets(self):
+    chars = []
+    for line in self.path.read_text(encoding='utf-8').splitlines():
+      match = re.match(r'0x([0-9A-Fa-f]{4,6})\b', line)
+      if match:
+        chars.append(chr(int(match[1], 16)))
+    return {self.path.stem: chars}
+
+
+registerSourceType('.txt', DataSourceTextFile)
+registerSourceType('.json', DataSourceJsonFile)
+registerSourceType('.nam', DataSourceNamFile)
@@ -0,0 +1,268 @@
+'''
+SQLite database of languages, their chars, and the coverage of fonts, so
+that coverage can be queried by other tools (or the sqlite3 shell) without
+loading TalkingLeaves. Uses only the standard library.
+
+Tables:
+
+  scripts         id, name, speakers
+  langs           id, iso, name, script_id, speakers, lang_status, ortho_status
+  lang_chars      lang_id, codepoint
+  fonts           id, path, mtime_ns, size, checked
+  font_codepoints font_id, codepoint
+  coverage        font_id, lang_id, complete, missing_count
+
+and a view, missing (font_id, lang_id, codepoint), of the chars each font
+is missing for each lang. Find all living primary orthographies missing
+U+01DD in any font:
+
+  SELECT fonts.path, langs.id FROM missing
+    JOIN fonts ON fonts.id = missing.font_id
+    JOIN langs ON langs.id = missing.lang_id
+    WHERE missing.codepoint = 0x01DD
+      AND langs.lang_status = 'living' AND langs.ortho_status = 'primary'
+'''
+
+import hashlib, pathlib, sqlite3, time
+import TalkingLeaves.utils as utils
+
+# Bump this whenever the schema changes, so that old databases are rebuilt
+SCHEMA_VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+CREATE TABLE IF NOT EXISTS scripts (
+  id TEXT PRIMARY KEY,
+  name TEXT,
+  speakers INTEGER
+);
+CREATE TABLE IF NOT EXISTS langs (
+  id TEXT PRIMARY KEY,
+  iso TEXT,
+  name TEXT,
+  script_id TEXT,
+  speakers INTEGER,
+  lang_status TEXT,
+  ortho_status TEXT
+);
+CREATE INDEX IF NOT EXISTS langs_iso ON langs (iso);
+CREATE INDEX IF NOT EXISTS langs_script ON langs (script_id);
+CREATE INDEX IF NOT EXISTS langs_status ON langs (lang_status, ortho_status);
+CREATE TABLE IF NOT EXISTS lang_chars (
+  lang_id TEXT,
+  codepoint INTEGER,
+  PRIMARY KEY (lang_id, codepoint)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lang_chars_codepoint ON lang_chars (codepoint, lang_id);
+CREATE TABLE IF NOT EXISTS fonts (
+  id INTEGER PRIMARY KEY,
+  path TEXT UNIQUE,
+  mtime_ns INTEGER,
+  size INTEGER,
+  checked REAL
+);
+CREATE TABLE IF NOT EXISTS font_codepoints (
+  font_id INTEGER,
+  codepoint INTEGER,
+  PRIMARY KEY (font_id, codepoint)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+  font_id INTEGER,
+  lang_id TEXT,
+  complete INTEGER,
+  missing_count INTEGER,
+  PRIMARY KEY (font_id, lang_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS coverage_lang ON coverage (lang_id, complete);
+CREATE VIEW IF NOT EXISTS missing AS
+  SELECT fonts.id AS font_id, lang_chars.lang_id, lang_chars.codepoint
+  FROM fonts JOIN lang_chars
+  WHERE NOT EXISTS (
+    SELECT 1 FROM font_codepoints
+    WHERE font_codepoints.font_id = fonts.id AND font_codepoints.codepoint = lang_chars.codepoint
+  );
+'''
+
+
+def defaultPath():
+  return utils.cacheDir() / 'coverage.sqlite'
+
+
+def dataKey(data):
+
+  '''
+  Identifies the data sources a Data was loaded from. If any of them can't
+  tell whether it changed, the scripts and langs themselves are hashed
+  instead, which is slower, but still cheaper than rewriting the database.
+  '''
+
+  keys = [(ds.cacheName(), ds.cacheKey()) for ds in data.sources]
+  if all(key is not None for _, key in keys):
+    return repr(keys)
+  h = hashlib.sha1()
+  for record in data.scripts.to_dict('records'):
+    h.update(repr(sorted(record.items())).encode('utf-8', 'surrogatepass'))
+  for _, record in sorted(data.langRecords.items()):
+    h.update(repr(sorted(record.items())).encode('utf-8', 'surrogatepass'))
+  return f"sha1:{h.hexdigest()}"
+
+
+class CoverageStore:
+
+  def __init__(self, path=None):
+    self.path = path or defaultPath()
+    self.db = sqlite3.connect(str(self.path))
+    self.db.row_factory = sqlite3.Row
+    self.db.execute('PRAGMA journal_mode = WAL')
+    self.db.execute('PRAGMA synchronous = NORMAL')
+    version = self.db.execute('PRAGMA user_version').fetchone()[0]
+    if version != SCHEMA_VERSION:
+      self.dropAll()
+    self.db.executescript(SCHEMA)
+    self.db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+  def close(self):
+    self.db.close()
+
+  def dropAll(self):
+    objects = self.db.execute(
+      "SELECT type, name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    with self.db:
+      for kind, name in objects:
+        self.db.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+
+  def getMeta(self, key):
+    row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+  def importData(self, data):
+
+    '''
+    Replace the scripts and langs with those of a Data. Skipped if it was
+    loaded from the same data sources as last time. Coverage of fonts is
+    cleared if the langs change, because it no longer matches.
+    '''
+
+    key = dataKey(data)
+    if key == self.getMeta('data'):
+      return False
+    with self.db:
+      for table in ('scripts', 'langs', 'lang_chars', 'coverage', 'font_codepoints', 'fonts'):
+        self.db.execute(f'DELETE FROM {table}')
+      self.db.executemany(
+        'INSERT INTO scripts VALUES (?, ?, ?)',
+        zip(data.scripts['id'], data.scripts['name'], (int(s) for s in data.scripts['speakers'])),
+      )
+      self.db.executemany(
+        'INSERT INTO langs VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (
+          (l['id'], l['iso'], l['name'], l['scriptId'], l['speakers'], l['lang_status'], l['ortho_status'])
+          for l in data.langRecords.values()
+        ),
+      )
+      self.db.executemany(
+        'INSERT OR IGNORE INTO lang_chars VALUES (?, ?)',
+        ((l['id'], ord(c)) for l in data.langRecords.values() for c in l['chars']),
+      )
+      self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('data', key))
+    self.analyze()
+    return True
+
+  def analyze(self):
+
+    '''
+    Update the statistics SQLite uses to plan queries. Without them, queries
+    that filter by status can end up scanning every lang of every font.
+    '''
+
+    self.db.execute('ANALYZE')
+
+  def fontIsCurrent(self, path, stat):
+    row = self.db.execute(
+      'SELECT mtime_ns, size FROM fonts WHERE path = ?', (str(path),)
+    ).fetchone()
+    return row is not None and tuple(row) == (stat.st_mtime_ns, stat.st_size)
+
+  def addFont(self, path, stat, codepoints, records):
+
+    '''
+    Store the codepoints of a font and its coverage records (see
+    Data.coverageRecords), replacing any previous ones for the same path
+    '''
+
+    with self.db:
+      self.db.execute(
+        '''
+        INSERT INTO fonts (path, mtime_ns, size, checked) VALUES (?, ?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size, checked = excluded.checked
+        ''',
+        (str(path), stat.st_mtime_ns, stat.st_size, time.time()),
+      )
+      fontId = self.db.execute('SELECT id FROM fonts WHERE path = ?', (str(path),)).fetchone()[0]
+      self.db.execute('DELETE FROM font_codepoints WHERE font_id = ?', (fontId,))
+      self.db.execute('DELETE FROM coverage WHERE font_id = ?', (fontId,))
+      self.db.executemany(
+        'INSERT INTO font_codepoints VALUES (?, ?)',
+        ((fontId, cp) for cp in sorted(codepoints)),
+      )
+      self.db.executemany(
+        'INSERT INTO coverage VALUES (?, ?, ?, ?)',
+        ((fontId, r['id'], r['complete'], r['missing_count']) for r in records),
+      )
+
+  def pruneFonts(self, found, folders=()):
+
+    '''
+    Delete the fonts that no longer exist, and the fonts in folders that
+    aren't in found (the paths found by searching those folders), with their
+    codepoints and coverage. Returns how many were deleted.
+    '''
+
+    found = {str(path) for path in found}
+    gone = []
+    for fontId, path in self.db.execute('SELECT id, path FROM fonts').fetchall():
+      if path in found:
+        continue
+      path = pathlib.Path(path)
+      if not path.exists() or any(path.is_relative_to(folder) for folder in folders):
+        gone.append((fontId,))
+    with self.db:
+      for table in ('font_codepoints', 'coverage'):
+        self.db.executemany(f'DELETE FROM {table} WHERE font_id = ?', gone)
+      self.db.executemany('DELETE FROM fonts WHERE id = ?', gone)
+    return len(gone)
+
+  def query(self, sql, params=()):
+    return [dict(row) for row in self.db.execute(sql, params)]
+
+  def langsMissing(self, codepoint, langStatus=None, orthoStatus=None):
+
+    '''
+    Fonts and langs that need codepoint but are missing it, optionally only
+    langs with the given statuses (e.g. 'living' and 'primary')
+    '''
+
+    sql = '''
+      SELECT fonts.path AS font, langs.id, langs.name, langs.script_id, langs.lang_status, langs.ortho_status
+      FROM lang_chars
+      JOIN langs ON langs.id = lang_chars.lang_id
+      JOIN fonts
+      WHERE lang_chars.codepoint = :codepoint
+        AND NOT EXISTS (
+          SELECT 1 FROM font_codepoints
+          WHERE font_codepoints.font_id = fonts.id AND font_codepoints.codepoint = :codepoint
+        )
+    '''
+    params = dict(codepoint=codepoint)
+    if langStatus:
+      sql += ' AND langs.lang_status = :langStatus'
+      params['langStatus'] = langStatus
+    if orthoStatus:
+      sql += ' AND langs.ortho_status = :orthoStatus'
+      params['orthoStatus'] = orthoStatus
+    sql += ' ORDER BY fonts.path, langs.speakers DESC'
+    return self.query(sql, params)
@@ -0,0 +1,112 @@
+import json, os, threading, time
+from urllib.parse import urlparse
+import TalkingLeaves.utils as utils
+
+# Point this at a local server (see dev/stub_pypi.py) to test update checks
+PYPI_URL = os.environ.get('TALKINGLEAVES_PYPI_URL', 'https://pypi.org/pypi/hyperglot/json')
+
+# How long a check result is trusted before asking PyPI again
+CHECK_TTL = 24 * 60 * 60
+
+# After a failed check, wait this long before trying again, doubling after
+# each consecutive failure up to the maximum
+RETRY_DELAY = 15 * 60
+MAX_RETRY_DELAY = 7 * 24 * 60 * 60
+
+
+class UpdateCheck:
+
+  '''
+  Check PyPI for the latest version of a package, at most once per
+  CHECK_TTL, remembering the result on disk between sessions.
+
+  Expired results are revalidated with a conditional request, so PyPI can
+  answer "304 Not Modified" without sending the metadata again. Nothing is
+  sent when the system reports that we're offline, and failures back off
+  exponentially. Everything runs off the main thread; the callback gets the
+  latest version string, or isn't called if it couldn't be found.
+  '''
+
+  def __init__(self, url=PYPI_URL, cachePath=None):
+    self.url = url
+    self.cachePath = cachePath or utils.cacheDir() / 'update-check.json'
+
+  def start(self, callback):
+    thread = threading.Thread(target=self.run, args=(callback,), daemon=True)
+    thread.start()
+
+  def run(self, callback):
+    state = self.readState()
+    now = time.time()
+
+    if state.get('url') != self.url:
+      state = dict(url=self.url)
+
+    if now - state.get('checked', 0) < CHECK_TTL:
+      if state.get('version'):
+        callback(state['version'])
+      return
+    if now < state.get('retryAfter', 0):
+      return
+    if not utils.hostIsReachable_(urlparse(self.url).hostname or ''):
+      return
+
+    headers = {}
+    if state.get('etag'):
+      headers['If-None-Match'] = state['etag']
+    if state.get('lastModified'):
+      headers['If-Modified-Since'] = state['lastModified']
+
+    def completion(text, status, responseHeaders):
+      self.handleResponse(state, text, status, responseHeaders, callback)
+
+    utils.getURL_headers_then_(self.url, headers, completion)
+
+  def handleResponse(self, state, text, status, responseHeaders, callback):
+    now = time.time()
+    version = None
+    if status == 304:
+      version = state.get('version')
+    elif status == 200:
+      try:
+        version = utils.parseJson_(text)['info']['version']
+      except Exception:
+        version = None
+
+    if version:
+      if status == 200:
+        # New metadata replaces the old validators, even if it has none
+        state.pop('etag', None)
+        state.pop('lastModified', None)
+      state.update(checked=now, version=version, failures=0, retryAfter=0)
+      if 'etag' in responseHeaders:
+        state['etag'] = responseHeaders['etag']
+      if 'last-modified' in responseHeaders:
+        state['lastModified'] = responseHeaders['last-modified']
+    else:
+      failures = state.get('failures', 0) + 1
+      state.update(
+        failures=failures,
+        retryAfter=now + min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY),
+      )
+    self.writeState(state)
+
+    if version:
+      callback(version)
+
+  def readState(self):
+    try:
+      with open(self.cachePath, encoding='utf-8') as f:
+        return json.load(f)
+    except (OSError, ValueError):
+      return {}
+
+  def writeState(self, state):
+    # Write to a temp file first so that a crash can't leave half a file
+    tmpPath = self.cachePath.with_suffix('.tmp')
+    try:
+      with open(tmpPath, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+      os.replace(tmpPath, self.cachePath)
+    except OSError:
+      pass
@@ -1,35 +1,129 @@
-from AppKit import NSPasteboard, NSString, NSURL, NSURLSession, NSColorList
-import json, csv, io, webbrowser, pathlib
-import GlyphsApp
+import json, csv, io, os, re, sys, webbrowser, pathlib
+
+# AppKit is imported inside the functions that need it, so that the data
+# modules can use this module without AppKit (e.g. on Linux, see __main__.py)
 
 class SimpleVersion:
 
   '''
-  Simple class for comparing version numbers in 1.1.1 format. This will 
-  probably break if the libraries it's used on have a version number that 
-  doesn't match the simple 3-number format. Currently only using it on 
-  Hyperglot and not expecting them to change version format. Otherwise we'll
-  need to add a new dependency to parse PEP 440 version numbers, as there's 
-  nothing in Python stdlib that can do it, apparently.
+  Simple class for comparing version numbers like 1.2.3. Release numbers can
+  have any length (1.2 == 1.2.0), and a trailing pre-release, post-release
+  or dev tag (1.2.3b1, 1.2.3.post1, 1.2.3.dev0) is ordered the way PEP 440
+  orders them. Local versions and epochs aren't used by Hyperglot, so they
+  aren't supported. Anything unparseable compares as 0.
   '''
 
+  _pattern = re.compile(
+    r'^v?(?P<release>\d+(?:\.\d+)*)'
+    r'(?:[-_.]?(?P<pre>a|alpha|b|beta|c|rc|pre|preview)[-_.]?(?P<preN>\d*))?'
+    r'(?:[-_.]?(?:post|rev|r)[-_.]?(?P<post>\d*))?'
+    r'(?:[-_.]?dev[-_.]?(?P<dev>\d*))?$',
+    re.IGNORECASE,
+  )
+  _preRanks = dict(a=0, alpha=0, b=1, beta=1, c=2, rc=2, pre=2, preview=2)
+
   def __init__(self, version):
-    parts = version.split('.')
-    if len(parts) == 3 and all(p.isnumeric() for p in parts):
-      self.parts = [int(p) for p in parts]
+    self.version = version
+    match = self._pattern.match(version.strip())
+    if not match:
+      self.key = ((0,), (1,), (-1,), (1,))
+      return
+    release = [int(p) for p in match['release'].split('.')]
+    while len(release) > 1 and release[-1] == 0:
+      release.pop()
+    # Pre-releases sort before the release, dev releases before everything
+    # else with the same release number
+    if match['pre']:
+      pre = (0, self._preRanks[match['pre'].lower()], int(match['preN'] or 0))
+    elif match['dev'] is not None and match['post'] is None:
+      pre = (-1,)
+    else:
+      pre = (1,)
+    post = (-1,) if match['post'] is None else (int(match['post'] or 0),)
+    dev = (1,) if match['dev'] is None else (0, int(match['dev'] or 0))
+    self.key = (tuple(release), pre, post, dev)
+
+  def __repr__(self):
+    return f"SimpleVersion('{self.version}')"
+
+  def __eq__(self, other):
+    return self.key == other.key
+
+  def __hash__(self):
+    # Equal versions (1.2 and 1.2.0) have the same key, so the same hash
+    return hash(self.key)
 
   def __lt__(self, other):
-    for i, p in enumerate(self.parts):
-      if p < other.parts[i]:
-        return True
-      if p > other.parts[i]:
-        return False
+    return self.key < other.key
+
+  def __gt__(self, other):
+    return self.key > other.key
 
 def bundleResourcesDir(asString=False):
   if asString:
     return str(pathlib.Path(__file__).parent)
   return pathlib.Path(__file__).parent
 
+def cacheDir():
+
+  '''
+  Folder for files that TalkingLeaves can recreate if they're deleted
+  '''
+
+  if sys.platform == 'darwin':
+    path = pathlib.Path('~/Library/Caches/TalkingLeaves').expanduser()
+  else:
+    path = pathlib.Path('~/.cache/TalkingLeaves').expanduser()
+  path.mkdir(parents=True, exist_ok=True)
+  return path
+
+def pythonExecutable():
+
+  '''
+  The Python interpreter that worker processes can be started with, or None.
+  Inside Glyphs, sys.executable is the app, but the Python framework that
+  Glyphs runs (from its Plugin Manager, or a custom one chosen in Settings)
+  has its interpreter in the bin folder of sys.prefix.
+  '''
+
+  executable = pathlib.Path(sys.executable or '')
+  if executable.name.lower().startswith('python'):
+    return str(executable)
+  version = f"{sys.version_info.major}.{sys.version_info.minor}"
+  for name in (f"python{version}", 'python3'):
+    candidate = pathlib.Path(sys.prefix) / 'bin' / name
+    if candidate.is_file() and os.access(candidate, os.X_OK):
+      return str(candidate)
+  return None
+
+def canStartProcesses():
+  return pythonExecutable() is not None and (os.cpu_count() or 1) > 1
+
+def mapInProcesses_(function, items, jobs=None):
+
+  '''
+  Return [function(item) for item in items], computed by a pool of worker
+  processes when that's possible, and one by one otherwise. Results are in
+  the same order as items either way. function must be importable by the
+  workers, i.e. defined at the top level of a module.
+  '''
+
+  items = list(items)
+  if len(items) > 1 and canStartProcesses() and jobs != 1:
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    # On macOS workers are spawned, by running sys.executable unless told
+    # otherwise. They get sys.path from this process.
+    if pythonExecutable() != sys.executable:
+      multiprocessing.set_executable(pythonExecutable())
+    try:
+      with ProcessPoolExecutor(jobs) as pool:
+        return list(pool.map(function, items))
+    except (BrokenProcessPool, OSError):
+      pass
+  return [function(item) for item in items]
+
 def parseJson_(text):
   return json.loads(text)
 
@@ -41,21 +135,65 @@ def csvFromRows_(rows):
   return text.getvalue()
 
 def writePasteboardText_(text):
+  from AppKit import NSPasteboard, NSString
   pasteboard = NSPasteboard.generalPasteboard()
   pasteboard.clearContents()
   pasteboard.writeObjects_([NSString(text)])
 
-def getTextFromURL_successfulThen_(url, successCallback):
-  url = NSURL.URLWithString_(url)
+def getURL_headers_then_(url, headers, completionCallback, timeout=10):
+
+  '''
+  Get url with request headers, and call completionCallback with (text,
+  status, responseHeaders), where status is None if the request failed.
+  Local caching is bypassed so that conditional requests (If-None-Match
+  etc.) reach the server.
+  '''
+
+  from AppKit import NSURL, NSURLSession, NSMutableURLRequest
+
+  request = NSMutableURLRequest.requestWithURL_cachePolicy_timeoutInterval_(
+    NSURL.URLWithString_(url),
+    1,  # NSURLRequestReloadIgnoringLocalCacheData
+    timeout,
+  )
+  for name, value in headers.items():
+    request.setValue_forHTTPHeaderField_(value, name)
 
   def callback(data=None, response=None, error=None):
-    if data and response and not error:
-      successCallback(data.decode('utf-8'))
+    if error or response is None:
+      completionCallback(None, None, {})
+      return
+    responseHeaders = {
+      str(k).lower(): str(v) for k, v in response.allHeaderFields().items()
+    }
+    text = bytes(data).decode('utf-8') if data else ''
+    completionCallback(text, response.statusCode(), responseHeaders)
 
-  dataTask = NSURLSession.sharedSession().dataTaskWithURL_completionHandler_(url, callback)
+  dataTask = NSURLSession.sharedSession().dataTaskWithRequest_completionHandler_(request, callback)
   dataTask.resume()
 
+def hostIsReachable_(host):
+
+  '''
+  Ask the system whether host can be reached without sending anything over
+  the network. If we can't tell, assume it's reachable.
+  '''
+
+  try:
+    from SystemConfiguration import (
+      SCNetworkReachabilityCreateWithName, SCNetworkReachabilityGetFlags,
+      kSCNetworkReachabilityFlagsReachable,
+    )
+  except ImportError:
+    return True
+  target = SCNetworkReachabilityCreateWithName(None, host.encode('utf-8'))
+  if target is None:
+    return True
+  ok, flags = SCNetworkReachabilityGetFlags(target, None)
+  return not ok or bool(flags & kSCNetworkReachabilityFlagsReachable)
+
 def getSystemColorByName_(name):
+  from AppKit import NSColorList
   # List of system colours can be found here:
   # NSColorList.colorListNamed_('System').allKeys()
   return NSColorList.colorListNamed_('System').colorWithKey_(name)
@@ -0,0 +1,856 @@
+# -*- coding: utf-8 -*-
+
+__doc__ = '''
+The TalkingLeaves window. This is the only module that needs AppKit and
+vanilla; the data modules can also be used headless (see __main__.py).
+'''
+
+import sys
+from GlyphsApp import Glyphs, Message
+from vanilla import (
+  Window, Group, List2, Button, HelpButton, SplitView, CheckBox, TextBox, SearchBox, EditTextList2Cell, dialogs
+)
+import unicodedata
+import TalkingLeaves.utils as utils
+import TalkingLeaves.data as data
+import TalkingLeaves.export as export
+import TalkingLeaves.updates as updates
+import TalkingLeaves.windowstate as windowstate
+from TalkingLeaves.controller import Controller, coverageText
+from TalkingLeaves.scheduler import RefreshScheduler
+
+# Tell older Glyphs where to find dependencies
+if Glyphs.versionNumber < 3.2:
+  from pathlib import Path
+  PKGS_PATH = str(Path('~/Library/Application Support/Glyphs 3/Scripts/site-packages').expanduser())
+  if PKGS_PATH not in sys.path:
+    scriptsPath = str(Path('~/Library/Application Support/Glyphs 3/Scripts').expanduser())
+    pos = sys.path.index(scriptsPath) + 1
+    sys.path.insert(pos, PKGS_PATH)
+
+try:
+  import hyperglot
+  import hyperglot.languages
+  import hyperglot.language
+  import hyperglot.orthography
+except ModuleNotFoundError:
+  hyperglot = None
+
+HYPERGLOT_MIN_VER = "0.7.0"
+MIN_COLUMN_WIDTH = 20
+
+
+def main():
+
+  Glyphs.clearLog()
+  print("Running as script…")
+
+  if len(Glyphs.documents) == 0:
+    Message("Please open a font before running TalkingLeaves.", title='Cannot load TalkingLeaves', OKButton="Dismiss")
+    return
+
+  TalkingLeaves()
+
+
+class TalkingLeaves:
+
+  def __init__(self):
+
+    # Warn user and cancel startup if incompatible pyobjc version is installed
+    import objc
+    if objc.__version__ == "10.3":
+      answer = dialogs.message(
+        messageText='Incompatible pyobjc version',
+        informativeText='pyobjc 10.3 is incompatible with TalkingLeaves because it breaks the Vanilla library. Please upgrade to pyobjc>=10.3.1 and restart Glyphs.',
+      )
+      self._closeAppDevMode()
+      return
+
+    # Warn user and cancel startup if Hyperglot is not installed
+    if not hyperglot:
+      answer = dialogs.ask(
+        messageText='Hyperglot module is missing',
+        informativeText='Follow the installation instructions at https://github.com/justinpenner/TalkingLeaves#installation',
+        buttonTitles=[('Open in browser', 1), ('Cancel', 0)],
+      )
+      if answer:
+        utils.webbrowser.open('https://github.com/justinpenner/TalkingLeaves#installation')
+      self._closeAppDevMode()
+      return
+
+    # Warn user and cancel startup if minimum Hyperglot is not met
+    elif utils.SimpleVersion(hyperglot.__version__) < utils.SimpleVersion(HYPERGLOT_MIN_VER):
+      import sys
+      pythonVersion = '.'.join([str(x) for x in sys.version_info][:3])
+      message = f"Hyperglot >= {HYPERGLOT_MIN_VER} is required, but you have {hyperglot.__version__}.\n\nTo update, copy the following command, then paste it into Terminal:\n\npip3 install --python-version={pythonVersion} --only-binary=:all: --target=\"/Users/$USER/Library/Application Support/Glyphs 3/Scripts/site-packages\" --upgrade hyperglot\n\nThen, restart Glyphs."
+      dialogs.message(
+        messageText='Update required',
+        informativeText=message,
+      )
+      self._closeAppDevMode()
+      return
+
+
+    self.font = Glyphs.font
+    self.fontPath = Glyphs.currentDocument.filePath
+    self.windowSize = (1000, 600)
+
+    self.startGUI()
+
+    # Stand-alone developer mode uses a "fake" GlyphsApp API for testing
+    # without opening GlyphsApp.
+    if getattr(Glyphs, "devMode", False):
+      self._addDevTools()
+
+    saved = None
+    if self.fontPath:
+      saved = windowstate.readSaved(self.fontPath, {g.name for g in self.font.glyphs})
+    if saved:
+      self.showSavedTables(saved)
+
+    self.data = data.Data()
+    self.controller = Controller(self.data, self.font)
+    self.controller.refresher = self.makeRefresher()
+    if saved:
+      self.controller.restore(saved)
+    self.fillTables()
+
+    self.checkForHyperglotUpdates()
+
+  def _closeAppDevMode(self):
+    if getattr(Glyphs, "devMode", False):
+      from AppKit import NSApplication
+      app = NSApplication.sharedApplication()
+      app.terminate_(self)
+
+  def _addDevTools(self):
+    # Add menu item with Cmd-W shortcut to easily close window
+    from AppKit import NSApplication
+    app = NSApplication.sharedApplication()
+    fileMenu = app.mainMenu().itemAtIndex_(0)
+    fileMenu.submenu().addItemWithTitle_action_keyEquivalent_("Close Window", self.w.close, "w")
+
+  def startGUI(self):
+
+    self.scriptsColHeaders = [
+      # TODO: add ISO column, visible or hidden for indexing only?
+      # dict(
+      #   identifier='id',
+      #   title='ISO',
+      #   width=60,
+      # ),
+      dict(
+        identifier='name',
+        title='Script',
+        width=100,
+      ),
+      dict(
+        identifier='speakers',
+        title='L1 Speakers',
+        width=100,
+      ),
+    ]
+    self.langsColHeaders = [
+      # TODO: add ISO column, visible or hidden for indexing only?
+      # dict(
+      #   identifier='id',
+      #   title='ISO',
+      #   width=60,
+      # ),
+      dict(
+        identifier='name',
+        title='Language',
+        width=160,
+      ),
+      dict(
+        identifier='scriptId',
+        title='Script',
+        width=50,
+      ),
+      dict(
+        identifier='speakers',
+        title='L1 Speakers',
+        width=100,
+        valueToCellConverter=self.langSpeakersValue_toCell,
+        cellClass=TableCell,
+      ),
+      dict(
+        identifier='ortho_status',
+        title='Ortho. Status',
+        width=94,
+        valueToCellConverter=self.statusValue_toCell,
+        cellClass=TableCell,
+      ),
+      dict(
+        identifier='lang_status',
+        title='Lang. Status',
+        width=94,
+        valueToCellConverter=self.statusValue_toCell,
+        cellClass=TableCell,
+      ),
+      dict(
+        identifier='chars',
+        title='Missing Chars',
+        valueToCellConverter=self.missingValue_toCell,
+        cellClass=TableCell,
+      ),
+    ]
+    for colHeader in self.scriptsColHeaders + self.langsColHeaders:
+      colHeader['maxWidth'] = self.windowSize[0]
+      colHeader['minWidth'] = MIN_COLUMN_WIDTH
+      colHeader['sortable'] = True
+
+    # Build GUI with Vanilla
+    self.w = Window(
+      self.windowSize,
+      f"TalkingLeaves ({(Glyphs.currentDocument.filePath or self.font.familyName).split('/')[-1]} - {self.font.familyName})",
+      minSize=(640, 180),
+    )
+    self.scriptsTable = List2(
+      (0, 0, -0, -0),
+      [],
+      columnDescriptions=self.scriptsColHeaders,
+      allowsMultipleSelection=False,
+      enableTypingSensitivity=True,
+      selectionCallback=self.scriptsSelectionCallback,
+      menuCallback=self.scriptsUpdateMenu,
+    )
+    self.w.search = SearchBox(
+      "auto",
+      placeholder="Search all languages",
+      sizeStyle="regular",
+      callback=self.searchCallback,
+    )
+    self.w.search._nsObject.setToolTip_(
+      "Search languages of all scripts by name, ISO code, script, or character."
+    )
+    self.w.showComplete = CheckBox(
+      "auto",
+      "Show completed",
+      sizeStyle="regular",
+      value=False,
+      callback=self.showCompleteCallback,
+    )
+    self.w.showComplete._nsObject.setToolTip_(
+      "Show languages whose basic set of Unicode characters is covered by your font. Some languages require additional unencoded glyphs and features."
+    )
+    self.w.showIncomplete = CheckBox(
+      "auto",
+      "Show incomplete",
+      sizeStyle="regular",
+      value=True,
+      callback=self.showIncompleteCallback,
+    )
+    self.w.showIncomplete._nsObject.setToolTip_(
+      "Show languages whose basic set of Unicode characters is not yet covered by your font."
+    )
+    self.langsTable = List2(
+      (0, 0, -0, -0),
+      [],
+      columnDescriptions=self.langsColHeaders,
+      enableTypingSensitivity=True,
+      selectionCallback=self.langsSelectionCallback,
+      menuCallback=self.langsUpdateMenu,
+    )
+    panes = [
+      dict(view=self.scriptsTable, identifier="scripts", canCollapse=False, minSize=MIN_COLUMN_WIDTH),
+      dict(view=self.langsTable, identifier="langs", canCollapse=False, minSize=MIN_COLUMN_WIDTH),
+    ]
+    self.w.top = SplitView("auto", panes)
+    self.w.addGlyphs = Button(
+      "auto",
+      "Add selected glyphs",
+      sizeStyle="regular",
+      callback=self.addGlyphsCallback,
+    )
+    self.w.openRepo = HelpButton(
+      "auto",
+      callback=self.openRepoCallback,
+    )
+    self.w.statusBar = TextBox(
+      "auto",
+      text="",
+      sizeStyle="regular",
+      alignment="natural",
+      selectable=True,
+    )
+    self.w.flex = Group("auto")
+    rules = [
+      "H:|[top]|",
+      "H:|-pad-[statusBar]-gap-[flex(>=pad)]-gap-[search(180)]-gap-[showComplete]-gap-[showIncomplete]-gap-[addGlyphs]-gap-[openRepo]-gap-|",
+      "V:|[top]-pad-[statusBar]-pad-|",
+      "V:|[top]-pad-[flex]-pad-|",
+      "V:|[top]-pad-[search]-pad-|",
+      "V:|[top]-pad-[showComplete]-pad-|",
+      "V:|[top]-pad-[showIncomplete]-pad-|",
+      "V:|[top]-pad-[addGlyphs]-pad-|",
+      "V:|[top]-pad-[openRepo]-pad-|",
+    ]
+    metrics = dict(pad=12, gap=16)
+    self.w.addAutoPosSizeRules(rules, metrics)
+
+    # Open GUI
+    self.w.open()
+
+    # Pane widths don't work when SplitView is in auto layout
+    # Divider position has to be set after opening window
+    self.w.top.getNSSplitView().setPosition_ofDividerAtIndex_(260, 0)
+
+  def showSavedTables(self, saved):
+
+    '''
+    Show the tables as they were when the window was last closed on this
+    font, while the language data loads. Once it has, they're revalidated
+    against the font.
+    '''
+
+    state = saved['state']
+    self.scriptsTable.set(saved['scriptRows'])
+    self.w.search.set(state['query'])
+    self.w.showComplete.set(state['showComplete'])
+    self.w.showIncomplete.set(state['showIncomplete'])
+    self.langsTable.set(saved['rows'])
+    status = coverageText(state['scriptName'], state['query'], saved['numComplete'], saved['numIncomplete'])
+    if saved['stale']:
+      status += " (updating…)"
+    self.w.statusBar.set(status)
+
+    # Loading the data blocks the main thread, so draw them now
+    self.w.getNSWindow().displayIfNeeded()
+
+  def fillTables(self):
+
+    '''
+    Fill script and language lists with initial data, or the restored state
+    '''
+
+    self.scriptsTable.set(self.controller.scriptRows)
+    self.w.showComplete.set(self.controller.showComplete)
+    self.w.showIncomplete.set(self.controller.showIncomplete)
+    query = self.controller.query
+    scriptNames = [row['name'] for row in self.controller.scriptRows]
+    scriptIndex = scriptNames.index(self.controller.scriptName) if self.controller.scriptName in scriptNames else 0
+
+    # Fix some UI details…
+
+    # This triggers selectionCallback, which can't be done at instantiation
+    # time, or it will refresh langTable which doesn't exist yet.
+    self.scriptsTable._tableView.setAllowsEmptySelection_(False)
+    self.scriptsTable.setSelectedIndexes([scriptIndex])
+
+    # Picking the script left search mode, so go back to a restored search
+    if query:
+      self.w.search.set(query)
+      self.controller.setQuery(query)
+    self.updateStatusBar()
+
+    # Tables begin scrolled to 2nd row for some reason
+    self.scriptsTable.getNSTableView().scrollRowToVisible_(0)
+    self.langsTable.getNSTableView().scrollRowToVisible_(0)
+
+    # Refresh langs when window becomes active
+    self.w.bind('became key', self.windowBecameKey)
+    self.w.bind('close', self.windowClosed)
+
+  def makeRefresher(self):
+
+    '''
+    Coalesce rapid refreshes (arrowing through scripts, toggling filters,
+    switching windows) and compute them in the background, so that only the
+    latest state reaches the languages table
+    '''
+
+    from PyObjCTools import AppHelper
+    return RefreshScheduler(
+      snapshot=self.controller.snapshot,
+      compute=self.controller.computeRows,
+      deliver=self.deliverLangs,
+      callLater=AppHelper.callLater,
+      callAfter=AppHelper.callAfter,
+    )
+
+  def refreshLangs(self, sender=None):
+
+    '''
+    Load/reload languages for the currently selected script, soon
+    '''
+
+    self.controller.requestRefresh()
+
+  def deliverLangs(self, result):
+    changes = self.controller.applyRows(result)
+    if changes:
+      self.showLangs(changes)
+    else:
+      # Same rows, so keep the table as it is, with its selection and scroll
+      self.updateStatusBar()
+
+  def showLangs(self, changes):
+
+    '''
+    Show the controller's rows, after an action that changed them. Only the
+    rows that were removed, inserted or changed (see rowChanges) are updated,
+    so the table keeps its scroll position, and the selection of the rows
+    that are still there.
+    '''
+
+    from AppKit import NSMutableIndexSet, NSTableViewAnimationEffectNone
+
+    rows = self.controller.rows
+    tableView = self.langsTable.getNSTableView()
+    if tableView.sortDescriptors():
+      # Sorted by a column, so List2 has to arrange all of the rows again
+      self.langsTable.set(rows)
+      self.langsTable.setSelectedIndexes(sorted(self.controller.selection.selected))
+      self.updateStatusBar()
+      return
+
+    def indexSet(indexes):
+      result = NSMutableIndexSet.indexSet()
+      for i in indexes:
+        result.addIndex_(i)
+      return result
+
+    # List2 can only replace all of its items, so hand its data source the
+    # new items in their own order, then tell the table which rows moved
+    removed, inserted, changed = changes
+    source = self.langsTable._dataSourceAndDelegate
+    source._items = list(rows)
+    source._arrangedIndexes = list(range(len(rows)))
+    tableView.beginUpdates()
+    tableView.removeRowsAtIndexes_withAnimation_(indexSet(removed), NSTableViewAnimationEffectNone)
+    tableView.insertRowsAtIndexes_withAnimation_(indexSet(inserted), NSTableViewAnimationEffectNone)
+    tableView.endUpdates()
+    if changed:
+      self.langsTable.reloadData(changed)
+    self.updateStatusBar()
+
+  def updateStatusBar(self):
+    self.w.statusBar.set(self.controller.statusText())
+
+  def langSpeakersValue_toCell(self, value):
+
+    '''
+    Unknown speaker count has already been set to -1, so display it in the
+    cell as "no data"
+    '''
+
+    if value == -1:
+      return "(no data)"
+    else:
+      return value
+
+  def statusValue_toCell(self, value):
+
+    '''
+    Unknown status is "", so display it as "no data"
+    '''
+
+    if value == "":
+      return "(no data)"
+    else:
+      return value
+
+  def missingValue_toCell(self, value, displayLimit=50):
+
+    '''
+    If no chars are missing, display as "complete".
+    Add dotted circle to combining chars.
+    '''
+
+    if len(value) == 0:
+      return "(complete)"
+    else:
+      chars = list(value)
+
+      # Truncate to displayLimit
+      if len(chars) > displayLimit:
+        displayChars = chars[:displayLimit]
+      else:
+        displayChars = chars
+
+      # Add dotted circle to marks
+      for i, char in enumerate(displayChars):
+        if unicodedata.combining(char):
+          displayChars[i] = '◌' + char
+
+      text = ' '.join(displayChars)
+
+      # Add note if truncated
+      if len(chars) > displayLimit:
+        text = f"{text} {chr(0x200e)}(+ {len(chars)-displayLimit} more)"
+
+      return text
+
+  def addGlyphsCallback(self, sender=None):
+
+    '''
+    Add missing glyphs from selected languages to the font, and open them in
+    a new tab
+    '''
+
+    # The fake GlyphsApp of dev mode can't make components or open tabs
+    devMode = getattr(Glyphs, "devMode", False)
+    plan = self.controller.addGlyphs(makeComponents=not devMode)
+    if devMode:
+      return
+
+    tab = self.font.newTab()
+    tab.text = ''.join([f"/{name} " for name in plan.order])
+    tab.setTitle_("New glyphs added")
+
+  def previewAddGlyphsCallback(self, sender=None):
+    plan = self.controller.planNewGlyphs()
+    lines = [
+      f"{len(plan.order)} new glyphs: {len(plan.composites)} can be built from components, {len(plan.toDraw)} need drawing.",
+    ]
+    if plan.composites:
+      lines.append(f"\nComposites:\n{' '.join(plan.composites)}")
+    if plan.toDraw:
+      toDraw = [
+        f"{name} (missing {', '.join(plan.missingComponents[name])})" if name in plan.missingComponents else name
+        for name in plan.toDraw
+      ]
+      lines.append(f"\nNeed drawing:\n{' '.join(toDraw)}")
+    Message('\n'.join(lines), title='Glyphs to add', OKButton='Dismiss')
+
+  def scriptsUpdateMenu(self, sender=None):
+    self.scriptsMenu = [
+      dict(
+        title=f"Look up {self.controller.scriptName} on Wikipedia",
+        enabled=True,
+        callback=self.scriptsWikipediaCallback,
+      ),
+      dict(
+        title=f"Show {self.controller.scriptName} coverage matrix",
+        enabled=True,
+        callback=self.scriptsMatrixCallback,
+      ),
+      dict(
+        title='Copy selected row',
+        enabled=True,
+        callback=self.scriptsCopySelectedRowCallback,
+      ),
+      dict(
+        title='Copy all rows',
+        enabled=True,
+        callback=self.scriptsCopyAllRowsCallback,
+      ),
+    ]
+    self.scriptsTable.setMenu(self.scriptsMenu)
+
+  def langsUpdateMenu(self, sender=None):
+
+    selection = self.controller.selection
+    numRowsSelected = selection.numSelected
+    if numRowsSelected == 1:
+      language = self.controller.selectedLangNames()[0]
+    else:
+      language = 'language'
+
+    selectionHasMissingChars = selection.hasMissingChars
+    scriptName = self.controller.scriptName
+
+    self.langsMenu = [
+      dict(
+        title=f'Look up {language} on Wikipedia',
+        enabled=numRowsSelected == 1,
+        callback=self.langsWikipediaCallback,
+      ),
+      dict(
+        title='Preview glyphs to add…',
+        enabled=selectionHasMissingChars,
+        callback=self.previewAddGlyphsCallback,
+      ),
+      dict(
+        title='Copy missing characters',
+        enabled=selectionHasMissingChars,
+        items=[
+          dict(
+            title='Space separated (marks keep dotted circles)',
+            callback=self.copyMissingSpaceSeparatedCallback,
+          ),
+          dict(
+            title='One per line',
+            callback=self.copyMissingOnePerLineCallback,
+          ),
+          dict(
+            title='Python list',
+            callback=self.copyMissingPythonListCallback,
+          ),
+        ],
+      ),
+      dict(
+        title='Copy missing codepoints',
+        enabled=selectionHasMissingChars,
+        items=[
+          dict(
+            title='One per line, Unicode notated',
+            callback=self.copyMissingCodepointsUnicode,
+          ),
+          dict(
+            title='One per line, hexadecimal',
+            callback=self.copyMissingCodepointsHex,
+          ),
+          dict(
+            title='One per line, decimal',
+            callback=self.copyMissingCodepointsDec,
+          ),
+        ],
+      ),
+      dict(
+        title='Copy selected rows',
+        enabled=numRowsSelected,
+        callback=self.langsCopySelectedRowsCallback,
+      ),
+      dict(
+        title='Copy all rows',
+        enabled=True,
+        callback=self.langsCopyAllRowsCallback,
+      ),
+      dict(
+        title='Export coverage',
+        enabled=True,
+        items=[
+          dict(
+            title=f'{scriptName} languages…',
+            callback=self.exportScriptCallback,
+          ),
+          dict(
+            title='All languages…',
+            callback=self.exportAllCallback,
+          ),
+        ],
+      ),
+      dict(
+        title='Completed characters',
+        enabled=True,
+        items=[
+          dict(
+            title='Select in Font View',
+            callback=self.langsSelectCompleteInFontView,
+          ),
+          dict(
+            title='Open in a new Edit View tab',
+            callback=self.langsOpenCompleteInNewTab,
+          ),
+        ],
+      ),
+    ]
+    self.langsTable.setMenu(self.langsMenu)
+    # Auto-enabling is on by default but Vanilla doesn't support it
+    self.langsTable._menu.setAutoenablesItems_(False)
+
+  def scriptsMatrixCallback(self, sender=None):
+    from TalkingLeaves.matrixview import CoverageMatrixWindow
+    script = self.controller.scriptName
+    self.matrixWindow = CoverageMatrixWindow(
+      self.controller.coverageMatrix(),
+      title=f"{script} coverage – {self.font.familyName}",
+    )
+
+  def scriptsCopySelectedRowCallback(self, sender=None):
+    self.copyRows_fromTable_(
+      rowIndexes=self.scriptsTable.getSelectedIndexes(),
+      table=self.scriptsTable,
+    )
+
+  def scriptsCopyAllRowsCallback(self, sender=None):
+    self.copyRows_fromTable_(
+      rowIndexes=self.scriptsTable.getArrangedIndexes(),
+      table=self.scriptsTable,
+    )
+
+  def langsCopySelectedRowsCallback(self, sender=None):
+    self.copyRows_fromTable_(
+      rowIndexes=self.langsTable.getSelectedIndexes(),
+      table=self.langsTable,
+    )
+
+  def langsCopyAllRowsCallback(self, sender=None):
+    self.copyRows_fromTable_(
+      rowIndexes=self.langsTable.getArrangedIndexes(),
+      table=self.langsTable,
+    )
+
+  def copyRows_fromTable_(self, rowIndexes, table):
+
+    '''
+    Copy List2 rows to pasteboard in CSV format with tab delimiters
+    User can paste into Numbers or other spreadsheet apps. Only the columns
+    of the table are copied, in the order they're shown, not the other
+    fields of the rows (like lang ids).
+    '''
+
+    items = table.get()
+    identifiers = table.getColumnIdentifiers()
+    rows = [[items[i].get(identifier, '') for identifier in identifiers] for i in rowIndexes]
+    utils.writePasteboardText_(utils.csvFromRows_(rows))
+
+  def exportScriptCallback(self, sender=None):
+    script = self.controller.scriptName
+    self.exportCoverage_scriptIds_(f"{script} coverage", [self.data.scriptIdForName(script)])
+
+  def exportAllCallback(self, sender=None):
+    self.exportCoverage_scriptIds_("Language coverage", None)
+
+  def exportCoverage_scriptIds_(self, title, scriptIds):
+
+    '''
+    Export full coverage data (untruncated missing chars and codepoints)
+    straight from the data model, not from the table rows
+    '''
+
+    fontName = self.font.familyName
+    path = dialogs.putFile(
+      messageText=f"Export {title}",
+      fileName=f"{fontName} {title}.tsv",
+      fileTypes=list(export.FORMATS),
+    )
+    if not path:
+      return
+    try:
+      export.exportRecords_toPath_(
+        self.controller.coverageRecords(scriptIds),
+        path,
+        data.COVERAGE_FIELDS,
+      )
+    except (ValueError, ImportError, OSError) as e:
+      Message(str(e), title='Export failed', OKButton='Dismiss')
+
+  def copyMissingSpaceSeparatedCallback(self, sender=None):
+    utils.writePasteboardText_(
+      ' '.join(self.controller.selectedMissingChars(marksAddDottedCircles=True))
+    )
+
+  def copyMissingOnePerLineCallback(self, sender=None):
+    utils.writePasteboardText_('\n'.join(self.controller.selectedMissingChars()) + '\n')
+
+  def copyMissingPythonListCallback(self, sender=None):
+    utils.writePasteboardText_(
+      str(self.controller.selectedMissingChars())
+    )
+
+  def copyMissingCodepointsUnicode(self, sender=None):
+    utils.writePasteboardText_(
+      '\n'.join([f"U+{ord(c):04X}" for c in self.controller.selectedMissingChars()])
+    )
+
+  def copyMissingCodepointsHex(self, sender=None):
+    utils.writePasteboardText_(
+      '\n'.join([f"{ord(c):0X}" for c in self.controller.selectedMissingChars()])
+    )
+
+  def copyMissingCodepointsDec(self, sender=None):
+    utils.writePasteboardText_(
+      '\n'.join([str(ord(c)) for c in self.controller.selectedMissingChars()])
+    )
+
+  def langsSelectCompleteInFontView(self, sender=None):
+    completed = self.controller.selectedCompleteChars()
+    self.font.selection = [
+      self.font.glyphs[self.data.glyphNameForChar(c, self.font)] for c in completed
+    ]
+
+  def langsOpenCompleteInNewTab(self, sender=None):
+    selectedLangNames = self.controller.selectedLangNames()
+    completed = self.controller.selectedCompleteChars()
+    tab = self.font.newTab()
+    tab.text = ''.join(
+      [f"/{self.data.glyphNameForChar(c, self.font)} " for c in completed]
+    )
+    tab.setTitle_(f"Completed for {', '.join(selectedLangNames)}")
+
+  def langsWikipediaCallback(self, sender=None):
+    utils.webbrowser.open(
+      'https://en.wikipedia.org/w/index.php?search={language} language'.format(
+        language=self.controller.selectedLangNames()[0]
+      )
+    )
+
+  def scriptsWikipediaCallback(self, sender=None):
+    utils.webbrowser.open(
+      'https://en.wikipedia.org/w/index.php?search={script} script'.format(
+        script=self.controller.scriptName
+      )
+    )
+
+  def scriptsSelectionCallback(self, sender=None):
+    # Picking a script leaves search mode
+    if self.w.search.get():
+      self.w.search.set("")
+    self.controller.selectScript(self.scriptsTable.getSelectedItems()[0]['name'])
+
+  def searchCallback(self, sender=None):
+    self.controller.setQuery(self.w.search.get())
+
+  def langsSelectionCallback(self, sender=None):
+    self.controller.selectLangs(self.langsTable.getSelectedIndexes())
+    self.updateStatusBar()
+
+  def showIncompleteCallback(self, sender=None):
+    self.controller.setShowIncomplete(self.w.showIncomplete.get())
+
+  def showCompleteCallback(self, sender=None):
+    self.controller.setShowComplete(self.w.showComplete.get())
+
+  def windowBecameKey(self, sender=None):
+    self.refreshLangs()
+
+  def windowClosed(self, sender=None):
+    self.controller.refresher.shutdown()
+    saved = self.controller.savedWindow()
+    if self.fontPath and saved:
+      windowstate.writeSaved(self.fontPath, saved)
+
+  def openRepoCallback(self, sender=None):
+    utils.webbrowser.open('https://github.com/justinpenner/TalkingLeaves')
+
+  def checkForHyperglotUpdates(self):
+
+    '''
+    Hyperglot is updated frequently, with new languages being added often, so
+    remind the user whenever updates are available. The check runs in the
+    background and PyPI is asked at most once a day (see updates.py).
+    '''
+
+    from PyObjCTools import AppHelper
+
+    def callback(latestVersion):
+      # Called from a background thread
+      AppHelper.callAfter(showMessage, latestVersion)
+
+    def showMessage(latestVersion):
+      if utils.SimpleVersion(latestVersion) > utils.SimpleVersion(hyperglot.__version__):
+        import sys
+        pythonVersion = '.'.join([str(x) for x in sys.version_info][:3])
+        message = f"Hyperglot {latestVersion} is now available, but you have {hyperglot.__version__}.\n\nTo update, copy the following command, then paste it into Terminal:\n\npip3 install --python-version={pythonVersion} --only-binary=:all: --target=\"/Users/$USER/Library/Application Support/Glyphs 3/Scripts/site-packages\" --upgrade hyperglot\n\nThen, restart Glyphs."
+        Message(
+          message,
+          title='Update available',
+          OKButton='Dismiss',
+        )
+
+    updates.UpdateCheck().start(callback)
+
+
+# List of system colours can be found here:
+# NSColorList.colorListNamed_('System').allKeys()
+class Colors:
+  red = utils.getSystemColorByName_('systemRedColor')
+  green = utils.getSystemColorByName_('systemGreenColor')
+  placeholder = utils.getSystemColorByName_('placeholderTextColor')
+  text = utils.getSystemColorByName_('textColor')
+
+
+class TableCell(EditTextList2Cell):
+
+  def set(self, value):
+    self.editText.set(value)
+    if value == "(no data)":
+      self.getNSTextField().setTextColor_(Colors.placeholder)
+    elif value == "(complete)":
+      self.getNSTextField().setTextColor_(Colors.placeholder)
+    else:
+      self.getNSTextField().setTextColor_(None)
+
@@ -0,0 +1,67 @@
+'''
+What the TalkingLeaves window last showed for each font file: the selected
+script, the search and filters, and the languages table, with the chars of
+each of its langs that aren't missing (for selecting complete chars). When
+the window is opened again on the same font, the saved tables are shown
+right away, before the language data has loaded, and then revalidated
+against the live font.
+
+Saved rows are marked stale if the font's glyph names changed since they were
+computed (see fingerprint). They're shown all the same, as the glyphs have
+usually only changed a little, until the refresh replaces them.
+'''
+
+import hashlib, os, pickle
+import TalkingLeaves.utils as utils
+
+# Bump this whenever what's saved changes
+CACHE_FORMAT = 2
+
+
+def fingerprint(glyphNames):
+
+  '''
+  Cheap fingerprint of a font's glyph inventory. Which langs are missing
+  which chars only depends on the glyph names that are in the font.
+  '''
+
+  h = hashlib.sha1()
+  for name in sorted(glyphNames):
+    h.update(name.encode('utf-8', 'surrogatepass'))
+    h.update(b'\n')
+  return h.hexdigest()
+
+
+def cachePath(fontPath):
+  key = hashlib.sha1(os.path.realpath(fontPath).encode('utf-8', 'surrogatepass')).hexdigest()
+  return utils.cacheDir() / 'windows' / f"{key}.pickle"
+
+
+def readSaved(fontPath, glyphNames):
+
+  '''
+  The saved window of a font file, or None. It's stale if the font's
+  glyphs changed since it was saved.
+  '''
+
+  try:
+    with open(cachePath(fontPath), 'rb') as f:
+      saved = pickle.load(f)
+  except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+    return None
+  if saved.get('format') != CACHE_FORMAT:
+    return None
+  saved['stale'] = saved['fingerprint'] != fingerprint(glyphNames)
+  return saved
+
+
+def writeSaved(fontPath, saved):
+  path = cachePath(fontPath)
+  try:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix('.tmp'), 'wb') as f:
+      pickle.dump(dict(saved, format=CACHE_FORMAT), f, protocol=pickle.HIGHEST_PROTOCOL)
+    path.with_suffix('.tmp').replace(path)
+  except OSError:
+    # Not critical, the window just starts out empty next time
+    pass
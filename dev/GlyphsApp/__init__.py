@@ -1,5 +1,7 @@
 # (Fake)GlyphsApp
 
+import os
+import glyphsLib
 from glyphsLib import GSFont
 import xml.etree.ElementTree as etree
 
@@ -26,16 +28,23 @@ class GSApplication:
 
   def _loadGlyphData(self):
     path = "/Applications/Glyphs 3.app/Contents/Frameworks/GlyphsCore.framework/Versions/A/Resources/GlyphData.xml"
+    if not os.path.exists(path):
+      # Without Glyphs (e.g. on Linux), use the copy that comes with glyphsLib
+      path = os.path.join(os.path.dirname(glyphsLib.__file__), "data", "GlyphData.xml")
     data = etree.parse(path)
     root = data.getroot()
-    return root
+    # Index by codepoint, because lookups are frequent
+    return {
+      glyph.attrib["unicode"]: dict(glyph.attrib)
+      for glyph in root
+      if "unicode" in glyph.attrib
+    }
 
   def glyphInfoForUnicode(self, code, font=None):
     codeStr = f"{code:04X}"
-    for glyph in self.glyphData:
-      if "unicode" in glyph.attrib and glyph.attrib["unicode"] == codeStr:
-        return GSGlyphInfo(code, dict(glyph.attrib))
-    return GSGlyphInfo(code, {"unicode": codeStr})
+    if codeStr in self.glyphData:
+      return GSGlyphInfo(code, self.glyphData[codeStr])
+    return GSGlyphInfo(code, {"unicode": codeStr, "name": f"uni{codeStr}"})
 
   def localize(self, strings):
     return strings[self.lang]
@@ -50,16 +59,21 @@ class GSDocument:
     self.font = font
     self.filePath = filePath
 
-class GSGlyph:
+class GSGlyph(glyphsLib.GSGlyph):
   def __init__(self, char):
-    self.string = char
-    self.name = Glyphs.glyphInfoForUnicode(ord(char))
-    self.layers = []
+    info = Glyphs.glyphInfoForUnicode(ord(char))
+    super().__init__(info.name)
+    self.unicode = info.attrib["unicode"]
 
 class GSGlyphInfo:
   def __init__(self, code, attrib):
     self.name = attrib.get("name", "")
     self.attrib = attrib
+    self.components = None
+    if attrib.get("decompose"):
+      self.components = [
+        GSGlyphInfo(None, {"name": name.strip()}) for name in attrib["decompose"].split(",")
+      ]
 
 def Message(message, title='Alert', OKButton=None):
   print(title)
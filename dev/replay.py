@@ -0,0 +1,129 @@
+# Replay a trace of TalkingLeaves interactions without a window, against the
+# fake GlyphsApp, and time each step. Works without AppKit, e.g. on Linux.
+#
+#   python3 replay.py [font.glyphs] [--trace trace.json] [--repeat N]
+#
+# A trace is a JSON list of [action, argument] pairs, e.g.
+#
+#   [["selectScript", "Cyrillic"], ["selectLangs", 10], ["addGlyphs", null]]
+#
+# See ACTIONS for the available actions. selectLangs takes a list of row
+# indexes, or a number of rows to select from the top. Without --trace, a
+# built-in trace is used. Each repeat starts again from the unmodified font.
+
+import sys
+import json
+import time
+import pathlib
+import argparse
+from collections import defaultdict
+
+parser = argparse.ArgumentParser()
+parser.add_argument("font", nargs="?", default="test.glyphs")
+parser.add_argument("--trace", type=pathlib.Path)
+parser.add_argument("--repeat", type=int, default=1)
+args = parser.parse_args()
+
+# The fake GlyphsApp reads the font path from sys.argv
+sys.argv = [sys.argv[0], args.font]
+pluginRoot = pathlib.Path(__file__).parent / "../TalkingLeaves.glyphsPlugin/Contents/Resources"
+sys.path.insert(0, str(pluginRoot))
+sys.path.insert(0, str(pathlib.Path(__file__).parent))
+
+from glyphsLib import GSFont
+import GlyphsApp
+from TalkingLeaves.data import Data
+from TalkingLeaves.controller import Controller
+
+DEFAULT_TRACE = [
+  ["focus", None],
+  ["selectScript", "Latin"],
+  ["selectLangs", 1],
+  ["selectLangs", 5],
+  ["selectLangs", 20],
+  ["planGlyphs", None],
+  ["addGlyphs", None],
+  ["focus", None],
+  ["showComplete", True],
+  ["selectScript", "Cyrillic"],
+  ["selectLangs", 10],
+  ["addGlyphs", None],
+  ["selectScript", "Arabic"],
+  ["search", "ar"],
+  ["search", "ara"],
+  ["search", "arab"],
+  ["search", ""],
+  ["selectScript", "Greek"],
+  ["selectLangs", 3],
+  ["copyMissing", None],
+  ["showIncomplete", False],
+  ["showIncomplete", True],
+  ["matrix", None],
+  ["export", None],
+  ["focus", None],
+]
+
+
+def selectLangs(controller, rows):
+  if isinstance(rows, int):
+    rows = range(min(rows, len(controller.rows)))
+  controller.selectLangs([i for i in rows if i < len(controller.rows)])
+
+
+ACTIONS = dict(
+  # The window refreshes whenever it becomes key, e.g. after editing the font
+  focus=lambda c, arg: c.refresh(),
+  selectScript=lambda c, name: c.selectScript(name),
+  search=lambda c, query: c.setQuery(query),
+  showComplete=lambda c, value: c.setShowComplete(value),
+  showIncomplete=lambda c, value: c.setShowIncomplete(value),
+  selectLangs=selectLangs,
+  planGlyphs=lambda c, arg: c.planNewGlyphs(),
+  # The fake GlyphsApp can't make components
+  addGlyphs=lambda c, arg: c.addGlyphs(makeComponents=False),
+  copyMissing=lambda c, arg: c.selectedMissingChars(marksAddDottedCircles=True),
+  matrix=lambda c, arg: c.coverageMatrix(),
+  export=lambda c, arg: c.coverageRecords(),
+)
+
+
+def main():
+  trace = json.loads(args.trace.read_text()) if args.trace else DEFAULT_TRACE
+  for action, _ in trace:
+    if action not in ACTIONS:
+      sys.exit(f"Unknown action {action!r}, use one of: {', '.join(ACTIONS)}")
+
+  start = time.perf_counter()
+  data = Data()
+  print(f"Loaded {len(data.langs)} orthographies in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+  timings = defaultdict(list)
+  for repeat in range(args.repeat):
+    font = GSFont(args.font)
+    GlyphsApp.Glyphs.font = font
+    start = time.perf_counter()
+    controller = Controller(data, font)
+    timings["(new controller)"].append(time.perf_counter() - start)
+
+    for action, arg in trace:
+      start = time.perf_counter()
+      ACTIONS[action](controller, arg)
+      # Like the window, update the status bar after every action
+      status = controller.statusText()
+      elapsed = time.perf_counter() - start
+      timings[action].append(elapsed)
+      if repeat == 0:
+        label = action if arg is None else f"{action} {arg!r}"
+        print(f"{elapsed * 1000:8.1f} ms  {label:<24} {status}")
+
+  print()
+  print(f"{'action':<20}{'count':>6}{'mean ms':>10}{'max ms':>10}{'total ms':>10}")
+  for action, times in timings.items():
+    print(
+      f"{action:<20}{len(times):>6}{sum(times) / len(times) * 1000:>10.1f}"
+      f"{max(times) * 1000:>10.1f}{sum(times) * 1000:>10.1f}"
+    )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,46 @@
+# Stub PyPI server for testing Hyperglot update checks without the network.
+#
+#   python3 stub_pypi.py [version] [port]
+#   TALKINGLEAVES_PYPI_URL=http://127.0.0.1:8765/pypi/hyperglot/json python3 run.py
+#
+# Responds with 304 Not Modified to conditional requests that match, so you
+# can see revalidation at work. Delete ~/Library/Caches/TalkingLeaves/update-check.json
+# to force a new check before the day is over.
+
+import sys
+import json
+import hashlib
+from email.utils import formatdate
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+version = sys.argv[1] if len(sys.argv) >= 2 else "99.0.0"
+port = int(sys.argv[2]) if len(sys.argv) >= 3 else 8765
+
+body = json.dumps(dict(info=dict(name="hyperglot", version=version))).encode("utf-8")
+etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+lastModified = formatdate(usegmt=True)
+
+
+class Handler(BaseHTTPRequestHandler):
+
+  def do_GET(self):
+    if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == lastModified:
+      self.send_response(304)
+      self.send_header("ETag", etag)
+      self.end_headers()
+      return
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.send_header("ETag", etag)
+    self.send_header("Last-Modified", lastModified)
+    self.end_headers()
+    self.wfile.write(body)
+
+
+def main():
+  print(f"Serving hyperglot {version} at http://127.0.0.1:{port}/pypi/hyperglot/json")
+  HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+if __name__ == '__main__':
+  main()